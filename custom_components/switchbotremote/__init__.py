@@ -2,69 +2,213 @@
 from __future__ import annotations
 
 import logging
+from datetime import timedelta
+
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import ConfigEntryNotReady
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.event import async_call_later, async_track_time_interval
+from homeassistant.helpers.storage import Store
 from .client import SwitchBot, switchbot_host
 
-from .const import DOMAIN
-from homeassistant.helpers import (
-    device_registry as dr,
-)
-
-PLATFORMS: list[Platform] = [
-    Platform.CLIMATE,
-    Platform.MEDIA_PLAYER,
-    Platform.LIGHT,
-    Platform.FAN,
-    Platform.BUTTON,
-    Platform.VACUUM,
-    Platform.REMOTE,
-    Platform.WATER_HEATER,
-]
+from .client.dispatcher import COMMAND_GAP
+from .client.scheduler import PRIORITY_BACKGROUND, SwitchbotQuotaExceededError
+from .const import CONF_COMMAND_GAP, CONF_DISCOVERY_INTERVAL, CONF_WEBHOOK, CONF_WEBHOOK_ID, DOMAIN
+from .coordinator import async_setup_hubs
+from .data import SwitchBotRemoteData
+from .pacing import HubPacingStore
+from .push import async_remove_cloud_webhook, async_setup_push
+from .reconcile import async_reconfigure, async_refresh, async_remove_stale_devices, platforms_for
+from .services import async_setup_services
+from .websocket import async_setup_websocket
+from .usage import ApiUsageTracker
+
+STORAGE_VERSION = 1
+REVALIDATE_RETRY_INTERVAL = 300
+
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
 
 _LOGGER = logging.getLogger(__name__)
 
 
+def _devices_store(hass: HomeAssistant, entry_id: str) -> Store:
+    """Last device list received from the cloud, used to start without it."""
+    return Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.devices")
+
+
+async def async_setup(hass: HomeAssistant, config: dict) -> bool:
+    """Set up the services and WebSocket commands of SwitchBot Remote IR."""
+    async_setup_services(hass)
+    async_setup_websocket(hass)
+    return True
+
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up SwitchBot Remote IR from a config entry."""
     hass.data.setdefault(DOMAIN, {})
 
-    entry.add_update_listener(update_listener)
+    entry.async_on_unload(entry.add_update_listener(update_listener))
 
     switchbot = SwitchBot(
-        token=entry.data["token"], 
-        secret=entry.data["secret"], 
-        host=entry.data.get("host", switchbot_host)
+        token=entry.data["token"],
+        secret=entry.data["secret"],
+        session=async_get_clientsession(hass),
+        host=entry.data.get("host", switchbot_host),
+        command_gap=entry.data.get(CONF_COMMAND_GAP, COMMAND_GAP),
     )
-    remotes = await hass.async_add_executor_job(switchbot.remotes)
+
+    usage = ApiUsageTracker(hass, entry.entry_id, switchbot.client)
+    await usage.async_load()
+    entry.async_on_unload(usage.async_start())
+    entry.async_on_unload(usage.async_save)
+
+    pacing = HubPacingStore(hass, entry.entry_id, switchbot.client.dispatcher)
+    await pacing.async_load()
+    entry.async_on_unload(pacing.async_start())
+    entry.async_on_unload(pacing.async_save)
+    entry.async_on_unload(pacing.async_cancel_feedback)
+
+    devices_store = _devices_store(hass, entry.entry_id)
+    stored = await devices_store.async_load()
+
+    if stored is not None:
+        # Build the entities from the last known list straight away and
+        # check it against the cloud once the platforms are set up.
+        switchbot.load_inventory(stored["devices"], stored.get("hubs", []))
+        switchbot.invalidate()
+        remotes = switchbot.known_remotes
+    else:
+        try:
+            remotes = await switchbot.remotes()
+        except Exception as exception:
+            raise ConfigEntryNotReady(f"Unable to fetch SwitchBot remotes: {exception}") from exception
+        await devices_store.async_save({"devices": switchbot.devices, "hubs": switchbot.hubs})
 
     _LOGGER.debug(f"Configuring remotes: {remotes}")
-    hass.data[DOMAIN][entry.entry_id] = remotes
+    data = SwitchBotRemoteData(
+        switchbot, remotes, usage, pacing, devices_store, platforms_for(entry, remotes), dict(entry.data)
+    )
+    hass.data[DOMAIN][entry.entry_id] = data
+
+    async_setup_hubs(hass, entry, data)
+
+    await hass.config_entries.async_forward_entry_setups(entry, data.platforms)
 
-    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    async_remove_stale_devices(hass, entry, data)
 
-    device_registry = dr.async_get(hass)
-    for device_entry in dr.async_entries_for_config_entry(
-        device_registry, entry.entry_id
-    ):
-        device_id = list(device_entry.identifiers)[0][1]
-        registered = next((remote for remote in remotes if remote.id == device_id), None)
+    if entry.data.get(CONF_WEBHOOK) and CONF_WEBHOOK_ID in entry.data:
+        entry.async_on_unload(async_setup_push(hass, entry, data))
+    elif CONF_WEBHOOK_ID in entry.data:
+        # Turned off since the last setup
+        entry.async_create_background_task(
+            hass, _async_disable_push(hass, entry, data), f"{DOMAIN}_webhook_{entry.entry_id}"
+        )
 
-        if not registered:
-            device_registry.async_remove_device(device_entry.id)
+    if stored is not None:
+        entry.async_create_background_task(
+            hass, _async_revalidate(hass, entry, data), f"{DOMAIN}_revalidate_{entry.entry_id}"
+        )
+
+    if interval := entry.data.get(CONF_DISCOVERY_INTERVAL):
+        async def _async_discover_interval(_now):
+            await _async_discover(hass, entry, data)
+
+        entry.async_on_unload(
+            async_track_time_interval(
+                hass, _async_discover_interval, timedelta(minutes=interval),
+                name=f"{DOMAIN}_discover_{entry.entry_id}",
+            )
+        )
 
     return True
 
 
+async def _async_discover(hass: HomeAssistant, entry: ConfigEntry, data: SwitchBotRemoteData):
+    """Pick up remotes added or removed in the SwitchBot app since the last fetch."""
+    if data.switchbot.inventory_fresh:
+        return
+
+    try:
+        # Background lane: shed first when the daily quota runs low
+        await async_refresh(hass, entry, data, priority=PRIORITY_BACKGROUND)
+    except SwitchbotQuotaExceededError as exception:
+        _LOGGER.debug(f"Skipping remote discovery: {exception}")
+    except Exception as exception:
+        _LOGGER.warning(f"Unable to discover SwitchBot remotes: {exception}")
+
+
+async def _async_disable_push(hass: HomeAssistant, entry: ConfigEntry, data: SwitchBotRemoteData):
+    """Delete the cloud webhook, then forget its id so that this is done once."""
+    if not await async_remove_cloud_webhook(hass, data.switchbot, entry.data[CONF_WEBHOOK_ID]):
+        return
+
+    entry_data = {key: value for key, value in entry.data.items() if key != CONF_WEBHOOK_ID}
+    # Known to the update listener, which would reload the entry otherwise
+    data.entry_data = dict(entry_data)
+    hass.config_entries.async_update_entry(entry, data=entry_data)
+
+
+async def _async_revalidate(hass: HomeAssistant, entry: ConfigEntry, data: SwitchBotRemoteData):
+    """Refresh the device list from the cloud and apply the differences."""
+    try:
+        await async_refresh(hass, entry, data)
+    except Exception as exception:
+        _LOGGER.warning(f"Unable to refresh SwitchBot remotes, retrying in {REVALIDATE_RETRY_INTERVAL} s: {exception}")
+
+        @callback
+        def _async_retry(_now):
+            entry.async_create_background_task(
+                hass, _async_revalidate(hass, entry, data), f"{DOMAIN}_revalidate_{entry.entry_id}"
+            )
+
+        entry.async_on_unload(async_call_later(hass, REVALIDATE_RETRY_INTERVAL, _async_retry))
+
+
 async def update_listener(hass: HomeAssistant, entry: ConfigEntry):
-    """Update listener."""
-    await hass.config_entries.async_reload(entry.entry_id)
+    """Apply changed device options in place, reload for anything else."""
+    data: SwitchBotRemoteData | None = hass.data[DOMAIN].get(entry.entry_id)
+    if data is None:
+        return
+
+    changed = {
+        key for key in entry.data.keys() | data.entry_data.keys()
+        if entry.data.get(key) != data.entry_data.get(key)
+    }
+    data.entry_data = dict(entry.data)
+    if not changed:
+        return
+
+    if changed - data.by_id.keys():
+        # Credentials, host or name
+        await hass.config_entries.async_reload(entry.entry_id)
+        return
+
+    _LOGGER.debug(f"Reconfiguring remotes: {changed}")
+    await async_reconfigure(hass, entry, data, changed)
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
-    if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
+    data: SwitchBotRemoteData = hass.data[DOMAIN][entry.entry_id]
+    if unload_ok := await hass.config_entries.async_unload_platforms(entry, data.platforms):
         hass.data[DOMAIN].pop(entry.entry_id)
 
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Drop the stored data and the cloud webhook of a removed config entry."""
+    if CONF_WEBHOOK_ID in entry.data:
+        switchbot = SwitchBot(
+            token=entry.data["token"],
+            secret=entry.data["secret"],
+            session=async_get_clientsession(hass),
+            host=entry.data.get("host", switchbot_host),
+        )
+        await async_remove_cloud_webhook(hass, switchbot, entry.data[CONF_WEBHOOK_ID])
+
+    await _devices_store(hass, entry.entry_id).async_remove()
+    await Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}.usage").async_remove()
+    await Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}.pacing").async_remove()
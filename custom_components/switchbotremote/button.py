@@ -1,16 +1,25 @@
 import humps, logging
 from typing import List
 from homeassistant.components.button import ButtonEntity
-from homeassistant.core import HomeAssistant
+from homeassistant.components.light import ATTR_BRIGHTNESS, ATTR_COLOR_TEMP_KELVIN
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.util import slugify
+from .client.macro import Macro
 from .client.remote import SupportedRemote
+from .client.scheduler import priority_for_context
+from .data import RemotesByClass, SwitchBotRemoteData, entry_data_for_remote
+from .macros import async_run_macro, macros_for
 
 from .const import (
     DOMAIN,
-    IR_CAMERA_TYPES,
-    IR_FAN_TYPES,
-    IR_LIGHT_TYPES,
+    SIGNAL_ADD_REMOTES,
+    CAMERA_CLASS,
+    FAN_CLASS,
+    LIGHT_CLASS,
     CLASS_BY_TYPE,
     CONF_CUSTOMIZE_COMMANDS,
     CONF_WITH_ION,
@@ -22,9 +31,18 @@ from .const import (
 
 _LOGGER = logging.getLogger(__name__)
 
+# Light buttons moving a level of the light entity, with the direction of a press
+LIGHT_STEPS = {
+    "DARKER": (ATTR_BRIGHTNESS, -1),
+    "BRIGHTER": (ATTR_BRIGHTNESS, 1),
+    "WARM": (ATTR_COLOR_TEMP_KELVIN, -1),
+    "WHITE": (ATTR_COLOR_TEMP_KELVIN, 1),
+}
+
 
 class SwitchBotRemoteButton(ButtonEntity):
     _attr_has_entity_name = False
+    _attr_should_poll = False
 
     def __init__(self, hass: HomeAssistant, sb: SupportedRemote, command_name: str, command_icon: str) -> None:
         super().__init__()
@@ -46,7 +64,7 @@ class SwitchBotRemoteButton(ButtonEntity):
         return f"SwitchBotRemoteButton(command={self._command_name}&device={self.device_info})"
 
     async def send_command(self, *args):
-        await self._hass.async_add_executor_job(self.sb.command, *args)
+        await self.sb.command(*args, priority=priority_for_context(self._context))
 
     @property
     def device_info(self):
@@ -76,52 +94,110 @@ class SwitchBotRemoteButton(ButtonEntity):
         """Handle the button press."""
         await self.send_command(self._command_action, None, self._customize)
 
-async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities) -> bool:
-    remotes: List[SupportedRemote] = hass.data[DOMAIN][entry.entry_id]
-    entities = []
 
-    for remote in remotes:
-        options = entry.data.get(remote.id, {})
-        customize_commands = options.get(CONF_CUSTOMIZE_COMMANDS, [])
+class SwitchBotLightStepButton(SwitchBotRemoteButton):
+    """A brightness or color temperature button, moving the level of the light entity."""
 
-        # Add predefined buttons for specific types
-        if (remote.type in IR_CAMERA_TYPES):
-            entities.append(SwitchBotRemoteButton(
-                hass, remote, "SHUTTER", "mdi:camera-iris"))
+    async def async_press(self) -> None:
+        """Send the press, then account for it like a volume up of a media player."""
+        await super().async_press()
+        if (data := entry_data_for_remote(self.hass, self.sb.id)) is None:
+            return
+        attribute, direction = LIGHT_STEPS[self._command_name]
+        for entity in data.entities.get(self.sb.id, []):
+            if hasattr(entity, "async_pressed"):
+                entity.async_pressed(attribute, direction)
+
+class SwitchBotMacroButton(SwitchBotRemoteButton):
+    def __init__(self, hass: HomeAssistant, sb: SupportedRemote, macro: Macro) -> None:
+        super().__init__(hass, sb, macro.name, "mdi:play-box-multiple")
+        self._macro = macro
+
+    def __repr__(self):
+        return f"SwitchBotMacroButton(macro={self._macro.name}&device={self.device_info})"
+
+    @property
+    def unique_id(self):
+        """Return a unique ID."""
+        return self._unique_id + "_macro_" + slugify(self._macro.name)
+
+    @property
+    def name(self) -> str:
+        """Return the display name of this button."""
+        return f"{self._device_name} {self._macro.name}"
+
+    async def async_press(self) -> None:
+        """Run the macro."""
+        result = await async_run_macro(self.sb, self._macro.steps, priority_for_context(self._context))
+        if result.aborted:
+            raise HomeAssistantError(f"Macro {self._macro.name} aborted: {result.errors[-1]}")
+
+
+def _create_buttons(hass: HomeAssistant, device_class: str, remote: SupportedRemote, options: dict) -> List[SwitchBotRemoteButton]:
+    entities = []
+    customize_commands = options.get(CONF_CUSTOMIZE_COMMANDS, [])
+
+    # Add predefined buttons for specific types
+    if (device_class == CAMERA_CLASS):
+        entities.append(SwitchBotRemoteButton(
+            hass, remote, "SHUTTER", "mdi:camera-iris"))
+        entities.append(SwitchBotRemoteButton(
+            hass, remote, "MENU", "mdi:menu"))
+        entities.append(SwitchBotRemoteButton(
+            hass, remote, "TIMER", "mdi:timer"))
+
+    if (device_class == FAN_CLASS):
+        if (options.get(CONF_WITH_ION, False)):
             entities.append(SwitchBotRemoteButton(
-                hass, remote, "MENU", "mdi:menu"))
+                hass, remote, "ION", "mdi:air-filter"))
+        if (options.get(CONF_WITH_TIMER, False)):
             entities.append(SwitchBotRemoteButton(
                 hass, remote, "TIMER", "mdi:timer"))
 
-        if (remote.type in IR_FAN_TYPES):
-            if (options.get(CONF_WITH_ION, False)):
-                entities.append(SwitchBotRemoteButton(
-                    hass, remote, "ION", "mdi:air-filter"))
-            if (options.get(CONF_WITH_TIMER, False)):
-                entities.append(SwitchBotRemoteButton(
-                    hass, remote, "TIMER", "mdi:timer"))
-
-        if (remote.type in IR_LIGHT_TYPES):
-            if (options.get(CONF_WITH_BRIGHTNESS, False)):
-                entities.append(SwitchBotRemoteButton(
-                    hass, remote, "DARKER", "mdi:brightness-4"))
-                entities.append(SwitchBotRemoteButton(
-                    hass, remote, "BRIGHTER", "mdi:brightness-6"))
-
-            if (options.get(CONF_WITH_TEMPERATURE, False)):
-                entities.append(SwitchBotRemoteButton(
-                    hass, remote, "WARM", "mdi:octagram-minus"))
-                entities.append(SwitchBotRemoteButton(
-                    hass, remote, "WHITE", "mdi:octagram-plus"))
-
-        for command in customize_commands:
-            if command and command.strip():
-                # Use the icon from MEDIA_PLAYER_COMMANDS if available, otherwise default to "mdi:remote"
-                command_info = MEDIA_PLAYER_COMMANDS.get(remote.type, {}).get("extra", {}).get(command, {})
-                icon = command_info.get("icon", "mdi:remote")
-                entities.append(SwitchBotRemoteButton(hass, remote, command, icon))
-
-    _LOGGER.debug(f'Adding buttons {entities}')
-    async_add_entities(entities)
+    if (device_class == LIGHT_CLASS):
+        if (options.get(CONF_WITH_BRIGHTNESS, False)):
+            entities.append(SwitchBotLightStepButton(
+                hass, remote, "DARKER", "mdi:brightness-4"))
+            entities.append(SwitchBotLightStepButton(
+                hass, remote, "BRIGHTER", "mdi:brightness-6"))
+
+        if (options.get(CONF_WITH_TEMPERATURE, False)):
+            entities.append(SwitchBotLightStepButton(
+                hass, remote, "WARM", "mdi:octagram-minus"))
+            entities.append(SwitchBotLightStepButton(
+                hass, remote, "WHITE", "mdi:octagram-plus"))
+
+    for command in customize_commands:
+        if command and command.strip():
+            # Use the icon from MEDIA_PLAYER_COMMANDS if available, otherwise default to "mdi:remote"
+            command_info = MEDIA_PLAYER_COMMANDS.get(remote.type, {}).get("extra", {}).get(command, {})
+            icon = command_info.get("icon", "mdi:remote")
+            entities.append(SwitchBotRemoteButton(hass, remote, command, icon))
+
+    for macro in macros_for(options).values():
+        entities.append(SwitchBotMacroButton(hass, remote, macro))
+
+    return entities
+
+
+async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities) -> bool:
+    data: SwitchBotRemoteData = hass.data[DOMAIN][entry.entry_id]
+
+    @callback
+    def async_add_remotes(by_class: RemotesByClass):
+        entities = []
+
+        for device_class, remotes in by_class.items():
+            for remote in remotes:
+                entities.extend(_create_buttons(hass, device_class, remote, entry.data.get(remote.id, {})))
+
+        _LOGGER.debug(f'Adding buttons {entities}')
+        data.track(entities)
+        async_add_entities(entities)
+
+    async_add_remotes(data.by_class)
+    entry.async_on_unload(
+        async_dispatcher_connect(hass, SIGNAL_ADD_REMOTES.format(entry.entry_id), async_add_remotes)
+    )
 
     return True
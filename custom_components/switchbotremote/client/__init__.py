@@ -1,27 +1,130 @@
+import asyncio
+import time
 import uuid
-from typing import List
+from typing import Dict, List, Optional
+
+import aiohttp
 
 from .client import SwitchBotClient, switchbot_host
+from .dispatcher import COMMAND_GAP
+from .scheduler import PRIORITY_AUTOMATION, PRIORITY_BACKGROUND
 from .remote import Remote
 
 from homeassistant.exceptions import ServiceValidationError
 
 __version__ = "2.3.1"
 
+INVENTORY_TTL = 300
+
 
 class SwitchBot:
-    def __init__(self, token: str, secret: str, host=switchbot_host):
-        self.client = SwitchBotClient(token, secret, nonce=str(uuid.uuid4()), host=host)
-
-    def remotes(self) -> List[Remote]:
-        response = self.client.get("devices")
-        return [
-            Remote.create(client=self.client, id=remote["device_id"], **remote)
-            for remote in response["body"]["infrared_remote_list"]
-        ]
-
-    def remote(self, id: str) -> Remote:
-        for remote in self.remotes():
-            if remote.id == id:
-                return remote
-        raise ServiceValidationError(f"Unknown remote {id}")
+    def __init__(
+        self,
+        token: str,
+        secret: str,
+        session: aiohttp.ClientSession,
+        host=switchbot_host,
+        inventory_ttl: float = INVENTORY_TTL,
+        command_gap: float = COMMAND_GAP,
+    ):
+        self.client = SwitchBotClient(
+            token, secret, nonce=str(uuid.uuid4()), session=session, host=host, command_gap=command_gap
+        )
+        self.inventory_ttl = inventory_ttl
+
+        self.devices: List[dict] = []
+        # Physical devices, the hubs the remotes are attached to among them
+        self.hubs: List[dict] = []
+        self._inventory: Dict[str, Remote] = {}
+        self._inventory_expires = 0.0
+        self._refresh: Optional[asyncio.Task] = None
+
+    @property
+    def inventory_fresh(self) -> bool:
+        return time.monotonic() < self._inventory_expires
+
+    @property
+    def known_remotes(self) -> List[Remote]:
+        """Return the cached inventory without checking its age."""
+        return list(self._inventory.values())
+
+    def invalidate(self):
+        """Force the next lookup to fetch the device list from the cloud."""
+        self._inventory_expires = 0.0
+
+    async def remotes(self, force_refresh: bool = False, priority: int = PRIORITY_AUTOMATION) -> List[Remote]:
+        if force_refresh or not self.inventory_fresh:
+            await self._async_refresh(priority)
+        return list(self._inventory.values())
+
+    async def remote(self, id: str) -> Remote:
+        if not self.inventory_fresh:
+            await self._async_refresh()
+        try:
+            return self._inventory[id]
+        except KeyError:
+            raise ServiceValidationError(f"Unknown remote {id}")
+
+    async def _async_refresh(self, priority: int = PRIORITY_AUTOMATION):
+        """Fetch the device list, sharing a single in-flight request between concurrent callers."""
+        if self._refresh is None:
+            self._refresh = asyncio.ensure_future(self._async_fetch(priority))
+            self._refresh.add_done_callback(self._refresh_done)
+        await asyncio.shield(self._refresh)
+
+    def _refresh_done(self, task: asyncio.Task):
+        self._refresh = None
+        if not task.cancelled():
+            # Retrieved by the awaiting callers, avoid the "never retrieved" warning
+            task.exception()
+
+    async def _async_fetch(self, priority: int):
+        response = await self.client.get("devices", priority=priority)
+        self.load_inventory(response["body"]["infrared_remote_list"], response["body"].get("device_list", []))
+
+    def load_inventory(self, devices: List[dict], hubs: Optional[List[dict]] = None):
+        """Replace the inventory with `devices` and `hubs` if given (decamelized API items).
+
+        Remotes that keep their id and type are updated in place, so references held
+        by entities stay valid."""
+        inventory = {}
+        for device in devices:
+            id = device["device_id"]
+            remote = self._inventory.get(id)
+            if remote is not None and remote.type == device.get("remote_type"):
+                remote.update(**device)
+            else:
+                remote = Remote.create(client=self.client, id=id, **device)
+            inventory[id] = remote
+
+        self.devices = devices
+        if hubs is not None:
+            self.hubs = hubs
+        self._inventory = inventory
+        self._inventory_expires = time.monotonic() + self.inventory_ttl
+
+    async def device_status(self, id: str, priority: int = PRIORITY_AUTOMATION) -> dict:
+        """Return the status of a physical device, e.g. the readings of a Hub 2."""
+        response = await self.client.get(f"devices/{id}/status", priority=priority)
+        return response["body"]
+
+    async def webhook_urls(self, priority: int = PRIORITY_BACKGROUND) -> List[str]:
+        """Return the URLs the SwitchBot cloud pushes the device events to."""
+        response = await self.client.post("webhook/queryWebhook", json={"action": "queryUrl"}, priority=priority)
+        return response["body"].get("urls", [])
+
+    async def setup_webhook(self, url: str, priority: int = PRIORITY_BACKGROUND):
+        """Have the SwitchBot cloud push the events of all devices to `url`."""
+        await self.client.post(
+            "webhook/setupWebhook",
+            json={"action": "setupWebhook", "url": url, "deviceList": "ALL"},
+            priority=priority,
+        )
+
+    async def delete_webhook(self, url: str, priority: int = PRIORITY_BACKGROUND):
+        """Stop the SwitchBot cloud from pushing events to `url`."""
+        await self.client.post(
+            "webhook/deleteWebhook",
+            json={"action": "deleteWebhook", "url": url},
+            priority=priority,
+        )
@@ -0,0 +1,52 @@
+import asyncio
+import logging
+import time
+from typing import Dict, List, NamedTuple, Optional
+
+from .remote import Remote
+from .scheduler import PRIORITY_AUTOMATION
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class BatchCommand(NamedTuple):
+    remote: Remote
+    command: str
+    parameter: Optional[str] = None
+    customize: bool = False
+
+
+class BatchResult(NamedTuple):
+    success: bool
+    error: Optional[str]
+    # Seconds from the start of the batch until the command was acknowledged or failed
+    elapsed: float
+
+
+async def run_batch(commands: List[BatchCommand], priority: int = PRIORITY_AUTOMATION) -> List[BatchResult]:
+    """Send `commands` in order within each hub and concurrently across hubs.
+
+    Batches running at the same time share the `batch_slots` of the client of each
+    command. A failed command does not stop the batch; the results come in the
+    order of `commands`."""
+    results: List[Optional[BatchResult]] = [None] * len(commands)
+    start = time.monotonic()
+
+    by_hub: Dict[Optional[str], List[int]] = {}
+    for index, item in enumerate(commands):
+        by_hub.setdefault(item.remote.hub_id, []).append(index)
+
+    async def _run_hub(indexes: List[int]):
+        for index in indexes:
+            item = commands[index]
+            error = None
+            async with item.remote.client.batch_slots:
+                try:
+                    await item.remote.command(item.command, item.parameter, item.customize, priority=priority)
+                except Exception as exception:
+                    _LOGGER.debug(f"Batch command {item.command} to {item.remote.id} failed: {exception}")
+                    error = str(exception) or type(exception).__name__
+            results[index] = BatchResult(error is None, error, round(time.monotonic() - start, 3))
+
+    await asyncio.gather(*(_run_hub(indexes) for indexes in by_hub.values()))
+    return results
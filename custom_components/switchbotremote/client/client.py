@@ -1,29 +1,73 @@
+import asyncio
 import base64
 import hashlib
 import hmac
 import time
 import logging
-from typing import Any
+from typing import Any, Callable
 
+import aiohttp
 import humps
-import time
-from requests import request
 
 from homeassistant.exceptions import HomeAssistantError
 
+from .dispatcher import COMMAND_GAP, HubDispatcher, HubTicket
+from .retry import CircuitBreaker, Deadline, RetryPolicy
+from .scheduler import PRIORITY_AUTOMATION, QuotaScheduler
+
 _LOGGER = logging.getLogger(__name__)
 switchbot_host = "https://api.switch-bot.com"
 api_version = "v1.1"
 
-MAX_TRIES = 5
-DELAY_BETWEEN_TRIES_MS = 500
+# Every attempt is bounded by these; the whole call, retries included, by REQUEST_DEADLINE.
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 10
+REQUEST_DEADLINE = 20
+
+# Commands of batches in flight at once per client, whatever the number of batches and hubs
+BATCH_CONCURRENCY = 4
+
+# Outcomes reported to request listeners, one per attempt sent to the cloud
+OUTCOME_OK = "ok"
+OUTCOME_500 = "500"
+OUTCOME_429 = "429"
+OUTCOME_NETWORK_ERROR = "network_error"
+OUTCOME_CANCELLED = "cancelled"
+OUTCOME_ERROR = "error"
+
+# Outcomes telling something about the hub the command went through; 429s
+# are about the account quota and cancelled calls about the caller.
+HUB_OUTCOMES = (OUTCOME_OK, OUTCOME_500, OUTCOME_NETWORK_ERROR, OUTCOME_ERROR)
+
+IDEMPOTENT_METHODS = ("GET", "PUT", "DELETE")
 
 class SwitchBotClient:
-    def __init__(self, token: str, secret: str, nonce: str, host=switchbot_host):
+    def __init__(
+        self,
+        token: str,
+        secret: str,
+        nonce: str,
+        session: aiohttp.ClientSession,
+        host=switchbot_host,
+        command_gap: float = COMMAND_GAP,
+    ):
         self._host = host
         self._token = token
         self._secret = secret
         self._nonce = nonce
+        # Home Assistant's pooled keep-alive session, shared with other integrations
+        self.session = session
+
+        self.timeout = aiohttp.ClientTimeout(total=None, connect=CONNECT_TIMEOUT, sock_read=READ_TIMEOUT)
+        self.retry_policy = RetryPolicy(
+            retry_on=RETRYABLE_ERRORS, deadline=REQUEST_DEADLINE, healthy_on=(SwitchbotRateLimitError,)
+        )
+        self.breaker = CircuitBreaker.for_host(host)
+        self.scheduler = QuotaScheduler.for_token(token)
+        self.dispatcher = HubDispatcher(command_gap)
+        # Shared by all the batches sent through this client
+        self.batch_slots = asyncio.Semaphore(BATCH_CONCURRENCY)
+        self._request_listeners: list[Callable[[str, str, str], None]] = []
 
     @property
     def headers(self):
@@ -46,19 +90,66 @@ class SwitchBotClient:
 
         return headers
 
-    def __request(self, method: str, path: str, **kwargs) -> Any:
+    def add_request_listener(self, listener: Callable[[str, str, str], None]) -> Callable[[], None]:
+        """Register `listener(method, path, outcome)`, called after every attempt; returns a remover."""
+        self._request_listeners.append(listener)
+        return lambda: self._request_listeners.remove(listener)
+
+    async def __request(
+        self, deadline: Deadline, method: str, path: str, priority: int, ticket: HubTicket | None, **kwargs
+    ) -> Any:
+        # Waiting for a quota token or for the hub is not the API being slow
+        max_wait = deadline.remaining
+        with deadline.paused():
+            await self.scheduler.acquire(priority, max_wait=max_wait)
+            if ticket is not None:
+                try:
+                    await ticket.acquire()
+                except asyncio.CancelledError:
+                    # Superseded while queued on the hub, nothing was sent
+                    self.scheduler.refund()
+                    raise
+
+        outcome = OUTCOME_ERROR
+        try:
+            result = await self.__send(method, path, **kwargs)
+            outcome = OUTCOME_OK
+            return result
+        except SwitchbotInternal500Error:
+            outcome = OUTCOME_500
+            raise
+        except SwitchbotRateLimitError:
+            outcome = OUTCOME_429
+            raise
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            outcome = OUTCOME_NETWORK_ERROR
+            raise
+        except asyncio.CancelledError:
+            outcome = OUTCOME_CANCELLED
+            raise
+        finally:
+            for listener in self._request_listeners:
+                listener(method, path, outcome)
+            if ticket is not None:
+                ticket.release()
+                if outcome in HUB_OUTCOMES:
+                    ticket.channel.record(outcome == OUTCOME_OK)
+
+    async def __send(self, method: str, path: str, **kwargs) -> Any:
         url = f"{self._host}/{api_version}/{path}"
         _LOGGER.debug(f"Calling service {url}")
-        response = request(method, url, headers=self.headers, **kwargs)
-
-        if response.status_code != 200:
-            _LOGGER.debug(f"Received http error {response.status_code} {response.text}")
-            if response.status_code != 500:
-                raise HomeAssistantError(f"SwitchBot API server returns status {response.status_code}")
-            else:
-                raise SwitchbotInternal500Error
+        kwargs.setdefault("timeout", self.timeout)
+        async with self.session.request(method, url, headers=self.headers, **kwargs) as response:
+            if response.status != 200:
+                _LOGGER.debug(f"Received http error {response.status} {await response.text()}")
+                if response.status == 500:
+                    raise SwitchbotInternal500Error
+                if response.status == 429:
+                    raise SwitchbotRateLimitError(retry_after=response.headers.get("Retry-After"))
+                raise HomeAssistantError(f"SwitchBot API server returns status {response.status}")
+
+            response_in_json = humps.decamelize(await response.json(content_type=None))
 
-        response_in_json = humps.decamelize(response.json())
         if response_in_json["status_code"] != 100:
             _LOGGER.debug(f"Received error in response {response_in_json}")
             raise HomeAssistantError(f'An error occurred: {response_in_json["message"]}')
@@ -66,33 +157,89 @@ class SwitchBotClient:
         _LOGGER.debug(f"Call service {url} OK")
         return response_in_json
 
-    def request(self, method: str, path: str, maxNumberOfTrials: int = MAX_TRIES, delayMSBetweenTrials: int = DELAY_BETWEEN_TRIES_MS, **kwargs) -> Any:
+    async def request(
+        self,
+        method: str,
+        path: str,
+        retry_policy: RetryPolicy | None = None,
+        deadline: float | None = None,
+        priority: int = PRIORITY_AUTOMATION,
+        ticket: HubTicket | None = None,
+        **kwargs,
+    ) -> Any:
         """Try to send the request.
-        If the server returns a 500 Internal error status, will retry until it succeeds or it passes a threshold of max number of tries.
+        500 and 429 responses and transient network errors are retried with exponential backoff and jitter,
+        as long as the retry policy and the per-host circuit breaker allow it. Requests that are not idempotent,
+        e.g. IR commands, are only retried when they cannot have reached the device: a 500 or 429 response, or
+        a connection that could not be made. A read timeout may follow a command the hub already sent.
+        The whole call is bounded by `deadline` seconds (the policy deadline by default) and is cancelled
+        together with the calling task.
+        Every attempt goes through the daily quota scheduler in the lane given by `priority`; the time
+        it waits there is not taken from the deadline, and it is shed if the daily pacing would hold it
+        back past the deadline.
+        With a hub `ticket`, the hub is held for each attempt only, not while waiting or backing off.
         Any other error will be thrown."""
-        for tryNumber in range(maxNumberOfTrials):
-            try:
-                result = self.__request(method, path, **kwargs)
-                return result
-            except SwitchbotInternal500Error:
-                _LOGGER.warning("Caught returned status 500 from SwitchBot API server")
-                _LOGGER.debug(f"tryNumber = {tryNumber}, waiting {delayMSBetweenTrials} ms")
-                time.sleep(delayMSBetweenTrials / 1000)
-        else:
-            # The following exception is only raised if all the request attempts have thrown a 500 error code
-            raise SwitchbotInternal500Error(f"Received multiple ({maxNumberOfTrials}) consecutive 500 errors from SwitchBot API server")
-
-    def get(self, path: str, **kwargs) -> Any:
-        return self.request("GET", path, **kwargs)
-
-    def post(self, path: str, **kwargs) -> Any:
-        return self.request("POST", path, **kwargs)
-
-    def put(self, path: str, **kwargs) -> Any:
-        return self.request("PUT", path, **kwargs)
-
-    def delete(self, path: str, **kwargs) -> Any:
-        return self.request("DELETE", path, **kwargs)
+        policy = retry_policy or self.retry_policy
+        return await policy.run(
+            lambda call_deadline: self.__request(call_deadline, method, path, priority, ticket, **kwargs),
+            self.breaker,
+            deadline,
+            None if method in IDEMPOTENT_METHODS else NOT_SENT_ERRORS,
+        )
+
+    @property
+    def retry_stats(self) -> dict:
+        """Return retry counters and circuit breaker state, for tuning."""
+        return {**self.retry_policy.as_dict(), "circuit": self.breaker.as_dict()}
+
+    @property
+    def quota_stats(self) -> dict:
+        """Return the daily quota scheduler state."""
+        return self.scheduler.as_dict()
+
+    @property
+    def hub_stats(self) -> dict:
+        """Return the command channel state of every hub."""
+        return self.dispatcher.as_dict()
+
+    async def get(self, path: str, **kwargs) -> Any:
+        return await self.request("GET", path, **kwargs)
+
+    async def post(self, path: str, **kwargs) -> Any:
+        return await self.request("POST", path, **kwargs)
+
+    async def put(self, path: str, **kwargs) -> Any:
+        return await self.request("PUT", path, **kwargs)
+
+    async def delete(self, path: str, **kwargs) -> Any:
+        return await self.request("DELETE", path, **kwargs)
 
 class SwitchbotInternal500Error(HomeAssistantError):
     """Exception raised if the 500 status error has been received from Switchbot cloud API"""
+
+
+class SwitchbotRateLimitError(HomeAssistantError):
+    """Exception raised if the 429 status error has been received from Switchbot cloud API"""
+
+    def __init__(self, retry_after: str | None = None):
+        super().__init__("SwitchBot API server is rate limiting requests")
+        try:
+            self.retry_after = float(retry_after) if retry_after is not None else None
+        except ValueError:
+            self.retry_after = None
+
+
+RETRYABLE_ERRORS = (
+    SwitchbotInternal500Error,
+    SwitchbotRateLimitError,
+    aiohttp.ClientConnectionError,
+    asyncio.TimeoutError,
+)
+
+# Retrying these can never send a request twice
+NOT_SENT_ERRORS = (
+    SwitchbotInternal500Error,
+    SwitchbotRateLimitError,
+    aiohttp.ClientConnectorError,
+    aiohttp.ConnectionTimeoutError,
+)
@@ -0,0 +1,173 @@
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+_LOGGER = logging.getLogger(__name__)
+
+# Hubs drop or garble IR codes sent back-to-back
+COMMAND_GAP = 0.5
+
+# The gap shrinks a little after every command that went through and grows
+# quickly after a failure, within these bounds. A smaller configured gap is
+# the floor instead of MIN_GAP.
+MIN_GAP = 0.2
+MAX_GAP = 5.0
+GAP_DECREASE = 0.95
+GAP_INCREASE = 1.5
+
+
+class HubTicket:
+    """Place of one command in the queue of its hub, kept across the retries of the command."""
+
+    def __init__(self, channel: "HubChannel", key: Optional[str]):
+        self.channel = channel
+        # Commands sharing a key, e.g. of the same remote, never overtake each other
+        self.key = key
+        self.waiter: Optional[asyncio.Future] = None
+
+    async def acquire(self):
+        """Wait until this command may be sent, see `HubChannel`."""
+        await self.channel._acquire(self)
+
+    def release(self):
+        """Let the next command go once the attempt is over, whatever its outcome."""
+        self.channel._release(sent=True)
+
+
+class HubChannel:
+    """Send the commands of one hub one at a time, in arrival order, `gap` seconds apart.
+
+    The hub is only held while an attempt is being sent. A command waiting for a
+    quota token or backing off before a retry is overtaken by the commands of
+    other remotes, but never by the later ones of its own remote.
+
+    The gap adapts to the hub: it decreases while commands succeed and increases
+    after failures, see `record`."""
+
+    def __init__(
+        self,
+        hub_id: Optional[str],
+        gap: float = COMMAND_GAP,
+        on_change: Optional[Callable[["HubChannel"], None]] = None,
+        min_gap: float = MIN_GAP,
+    ):
+        self.hub_id = hub_id
+        self.gap = gap
+        self.min_gap = min_gap
+        self._on_change = on_change
+
+        self._tickets: List[HubTicket] = []
+        self._busy = False
+        self._last_sent = 0.0
+        self.sent = 0
+        self.failures = 0
+
+    @property
+    def queued(self) -> int:
+        return len(self._tickets)
+
+    @contextmanager
+    def ticket(self, key: Optional[str] = None) -> Iterator[HubTicket]:
+        """Take a place in the queue for the duration of the block."""
+        ticket = HubTicket(self, key)
+        self._tickets.append(ticket)
+        try:
+            yield ticket
+        finally:
+            self._tickets.remove(ticket)
+            self._dispatch()
+
+    def _dispatch(self):
+        """Hand the hub to the first waiting command not behind one of its own key."""
+        if self._busy:
+            return
+        keys = set()
+        for ticket in self._tickets:
+            if ticket.key not in keys and ticket.waiter is not None and not ticket.waiter.done():
+                self._busy = True
+                ticket.waiter.set_result(None)
+                return
+            keys.add(ticket.key)
+
+    async def _acquire(self, ticket: HubTicket):
+        ticket.waiter = asyncio.get_running_loop().create_future()
+        self._dispatch()
+        try:
+            await ticket.waiter
+        except asyncio.CancelledError:
+            if ticket.waiter.done() and not ticket.waiter.cancelled():
+                self._release(sent=False)
+            raise
+        finally:
+            ticket.waiter = None
+
+        try:
+            wait = self._last_sent + self.gap - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+        except BaseException:
+            self._release(sent=False)
+            raise
+
+    def _release(self, sent: bool):
+        if sent:
+            self._last_sent = time.monotonic()
+            self.sent += 1
+        self._busy = False
+        self._dispatch()
+
+    def record(self, success: bool):
+        """Adapt the gap to the outcome of a command: an API attempt or a missed device feedback."""
+        if success:
+            gap = max(self.min_gap, self.gap * GAP_DECREASE)
+        else:
+            self.failures += 1
+            gap = min(MAX_GAP, max(MIN_GAP, self.gap) * GAP_INCREASE)
+            _LOGGER.debug(f"Command failed on hub {self.hub_id}, pacing at {gap:.2f} s")
+
+        if gap != self.gap:
+            self.gap = gap
+            if self._on_change is not None:
+                self._on_change(self)
+
+    def as_dict(self) -> dict:
+        return {"gap": round(self.gap, 3), "sent": self.sent, "failures": self.failures, "queued": self.queued}
+
+
+class HubDispatcher:
+    """Route commands to one channel per hub: ordered within a hub, concurrent across hubs."""
+
+    def __init__(self, gap: float = COMMAND_GAP):
+        self.gap = gap
+        self.min_gap = min(MIN_GAP, gap)
+        self._channels: Dict[Optional[str], HubChannel] = {}
+        self._listeners: List[Callable[[], None]] = []
+
+    def channel(self, hub_id: Optional[str]) -> HubChannel:
+        if hub_id not in self._channels:
+            self._channels[hub_id] = HubChannel(hub_id, self.gap, self._channel_changed, self.min_gap)
+        return self._channels[hub_id]
+
+    @property
+    def gaps(self) -> Dict[str, float]:
+        """Return the learned gap of every known hub."""
+        return {hub_id: channel.gap for hub_id, channel in self._channels.items() if hub_id is not None}
+
+    def restore(self, gaps: Dict[str, float]):
+        """Start from previously learned gaps."""
+        for hub_id, gap in gaps.items():
+            self.channel(hub_id).gap = min(MAX_GAP, max(self.min_gap, gap))
+
+    def add_listener(self, listener: Callable[[], None]) -> Callable[[], None]:
+        """Call `listener()` whenever a learned gap changes; returns a remover."""
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+    def _channel_changed(self, channel: HubChannel):
+        for listener in list(self._listeners):
+            listener()
+
+    def as_dict(self) -> dict:
+        return {str(hub_id): channel.as_dict() for hub_id, channel in self._channels.items()}
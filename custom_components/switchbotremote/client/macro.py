@@ -0,0 +1,135 @@
+import asyncio
+import logging
+import re
+import time
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+from .remote import Remote
+from .scheduler import PRIORITY_INTERACTIVE
+from .sequence import _consume_result
+
+_LOGGER = logging.getLogger(__name__)
+
+MAX_REPEAT = 50
+MAX_DELAY = 60
+
+_STEP = re.compile(r"^(?P<command>.+?)(?:(?:\s+x\s*|\s*\*\s*)(?P<repeat>\d+))?(?P<optional>\?)?$")
+_WAIT = re.compile(r"^wait\s+(?P<delay>\d+(?:\.\d+)?)\s*s?$", re.IGNORECASE)
+
+
+class MacroError(ValueError):
+    """Invalid macro definition."""
+
+
+class MacroStep(NamedTuple):
+    """Press `command` `repeat` times, or wait `delay` seconds if there is no command."""
+
+    command: Optional[str]
+    repeat: int = 1
+    delay: float = 0.0
+    # Keep going when the step fails instead of aborting the macro
+    optional: bool = False
+
+
+class Macro(NamedTuple):
+    name: str
+    steps: List[MacroStep]
+
+
+class MacroResult(NamedTuple):
+    sent: int
+    errors: List[str]
+    aborted: bool
+    elapsed: float
+
+
+def parse_steps(text: str) -> List[MacroStep]:
+    """Parse comma separated steps, e.g. `Power, wait 3, Input x2, OK?`.
+
+    `x N` repeats a press, `wait S` pauses and a trailing `?` lets the macro
+    go on if that press fails."""
+    steps = []
+    for token in (token.strip() for token in text.split(",")):
+        if not token:
+            continue
+        if wait := _WAIT.match(token):
+            delay = float(wait["delay"])
+            if delay > MAX_DELAY:
+                raise MacroError(f"Wait of {delay} s is longer than {MAX_DELAY} s")
+            steps.append(MacroStep(None, delay=delay))
+            continue
+
+        step = _STEP.match(token)
+        repeat = int(step["repeat"] or 1)
+        if not 1 <= repeat <= MAX_REPEAT:
+            raise MacroError(f"Repeat count of {step['command']} must be between 1 and {MAX_REPEAT}")
+        steps.append(MacroStep(step["command"].strip(), repeat, optional=bool(step["optional"])))
+
+    if not any(step.command for step in steps):
+        raise MacroError("A macro needs at least one command")
+    return steps
+
+
+def parse_macro(text: str) -> Macro:
+    """Parse a `Name: steps` definition, see `parse_steps`."""
+    name, separator, steps = text.partition(":")
+    if not separator or not name.strip():
+        raise MacroError(f"Expected 'Name: steps' in {text!r}")
+    return Macro(name.strip(), parse_steps(steps))
+
+
+async def run_macro(
+    remote: Remote,
+    steps: List[MacroStep],
+    resolve: Callable[[str], Tuple[str, bool]],
+    priority: int = PRIORITY_INTERACTIVE,
+) -> MacroResult:
+    """Run `steps` on `remote` as one job; `resolve` maps a command name to (action, customize).
+
+    The presses between two waits are queued on the hub channel at once, so the
+    commands of other remotes of the hub cannot slip in between them."""
+    start = time.monotonic()
+    sent = 0
+    errors: List[str] = []
+
+    # Presses between two waits, one per repeat
+    bursts: List[List[MacroStep]] = [[]]
+    delays: List[float] = []
+    for step in steps:
+        if step.command is None:
+            bursts.append([])
+            delays.append(step.delay)
+        else:
+            bursts[-1].extend([step] * step.repeat)
+
+    aborted = False
+    for index, burst in enumerate(bursts):
+        if index > 0:
+            await asyncio.sleep(delays[index - 1])
+
+        tasks = []
+        for step in burst:
+            action, customize = resolve(step.command)
+            task = asyncio.ensure_future(remote.command(action, None, customize, priority=priority))
+            task.add_done_callback(_consume_result)
+            tasks.append((step, task))
+
+        try:
+            for step, task in tasks:
+                try:
+                    await task
+                    sent += 1
+                except Exception as exception:
+                    errors.append(f"{step.command}: {exception}")
+                    if not step.optional:
+                        _LOGGER.debug(f"Aborting macro on {remote.id} after {step.command} failed: {exception}")
+                        aborted = True
+                        break
+        finally:
+            for _, task in tasks:
+                task.cancel()
+
+        if aborted:
+            break
+
+    return MacroResult(sent, errors, aborted, round(time.monotonic() - start, 3))
@@ -2,11 +2,15 @@ from __future__ import annotations
 
 import logging
 import humps
-from typing import ClassVar, Dict, Optional, Type
+from typing import ClassVar, Dict, Optional, Tuple, Type
 from .client import SwitchBotClient
+from .scheduler import PRIORITY_INTERACTIVE
 
 _LOGGER = logging.getLogger(__name__)
 
+# Shadow key of the commands setting the power state
+SHADOW_POWER = "power"
+
 class Remote:
     remote_type_for: ClassVar[Optional[str]] = None
     specialized_cls: ClassVar[Dict[str, Type[Remote]]] = {}
@@ -15,6 +19,12 @@ class Remote:
         self.client = client
 
         self.id: str = id
+        self.update(**extra)
+
+        # Last command acknowledged for each piece of device state
+        self.shadow: Dict[str, Tuple[str, str]] = {}
+
+    def update(self, **extra):
         self.name: str = extra.get("device_name")
         self.type: str = extra.get("remote_type")
         self.hub_id: str = extra.get("hub_device_id")
@@ -32,14 +42,30 @@ class Remote:
             remote_cls = cls.specialized_cls.get(remote_type, SupportedRemote)
             return remote_cls(client, id=id, **extra)
 
-    def command(
+    async def command(
         self,
         action: str,
         parameter: Optional[str] = None,
-        customize: Optional[bool] = False
-    ):
-        _LOGGER.debug(f"Sending command {action}")
+        customize: Optional[bool] = False,
+        priority: int = PRIORITY_INTERACTIVE,
+        shadow: Optional[str] = None,
+        force: bool = False,
+    ) -> bool:
+        """Send a command, returns whether it was sent.
+
+        `shadow` names the piece of device state the command sets, e.g. SHADOW_POWER:
+        an automation command is skipped if it is the last one acknowledged for that
+        state. Interactive calls are always sent, as is any call with `force`: a user
+        repeating a command resyncs a device that drifted. Any other command, e.g. a
+        button or a raw code, may change the device in ways unknown here and drops
+        every shadow of the remote."""
         parameter = "default" if parameter is None else parameter
+        force = force or priority == PRIORITY_INTERACTIVE
+        if shadow is not None and not force and self.shadow.get(shadow) == (action, parameter):
+            _LOGGER.debug(f"Skipping command {action} to {self}, already sent")
+            return False
+
+        _LOGGER.debug(f"Sending command {action}")
         command_type = "customize" if customize else "command"
         payload = humps.camelize(
             {
@@ -50,7 +76,24 @@ class Remote:
         )
 
         _LOGGER.debug(f"Command payload {payload}")
-        self.client.post(f"devices/{self.id}/commands", json=payload)
+        # Unknown until acknowledged
+        if shadow is not None:
+            self.shadow.pop(shadow, None)
+        else:
+            self.shadow.clear()
+
+        # IR commands of a hub are sent in order and paced, other hubs go in parallel
+        with self.client.dispatcher.channel(self.hub_id).ticket(self.id) as ticket:
+            await self.client.post(f"devices/{self.id}/commands", json=payload, priority=priority, ticket=ticket)
+
+        if shadow is not None:
+            self.shadow[shadow] = (action, parameter)
+        return True
+
+    def forget(self, *shadows: str):
+        """Drop the shadow of the given states, or all of them, e.g. when a sensor disagrees."""
+        for shadow in shadows or list(self.shadow):
+            self.shadow.pop(shadow, None)
 
     def __repr__(self):
         name = "Remote" if self.type is None else self.type
@@ -59,14 +102,22 @@ class Remote:
 
 
 class SupportedRemote(Remote):
-    def turn(self, state: str):
+    async def turn(self, state: str, priority: int = PRIORITY_INTERACTIVE, force: bool = False) -> bool:
         state = state.lower()
         assert state in ("on", "off")
-        self.command(humps.camelize(f"turn_{state}"))
+        return await self.command(humps.camelize(f"turn_{state}"), priority=priority, shadow=SHADOW_POWER, force=force)
 
 
 class OtherRemote(Remote):
     remote_type_for = "Others"
 
-    def command(self, action: str, parameter: Optional[str] = None, customize: Optional[bool] = False):
-        super().command(action, parameter, customize)
+    async def command(
+        self,
+        action: str,
+        parameter: Optional[str] = None,
+        customize: Optional[bool] = False,
+        priority: int = PRIORITY_INTERACTIVE,
+        shadow: Optional[str] = None,
+        force: bool = False,
+    ) -> bool:
+        return await super().command(action, parameter, customize, priority, shadow, force)
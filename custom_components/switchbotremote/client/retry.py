@@ -0,0 +1,245 @@
+import asyncio
+import logging
+import random
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, ClassVar, Dict, Optional, Tuple, Type
+
+from homeassistant.exceptions import HomeAssistantError
+
+_LOGGER = logging.getLogger(__name__)
+
+MAX_TRIES = 5
+BASE_DELAY = 0.5
+MAX_DELAY = 8.0
+DEFAULT_DEADLINE = 30.0
+
+FAILURE_THRESHOLD = 5
+RESET_TIMEOUT = 30.0
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class SwitchbotCircuitOpenError(HomeAssistantError):
+    """Exception raised when the circuit breaker rejects a call without sending it"""
+
+
+class SwitchbotDeadlineExceededError(HomeAssistantError):
+    """Exception raised when a call, retries included, did not finish before its deadline"""
+
+
+class Deadline:
+    """Time left to a call, which stops running while the call waits for its turn."""
+
+    def __init__(self, timeout: asyncio.Timeout):
+        self._timeout = timeout
+
+    @property
+    def remaining(self) -> float:
+        return max(0.0, self._timeout.when() - asyncio.get_running_loop().time())
+
+    @contextmanager
+    def paused(self):
+        """Do not count the time spent in the block, e.g. queued behind other calls."""
+        loop = asyncio.get_running_loop()
+        when = self._timeout.when()
+        start = loop.time()
+        self._timeout.reschedule(None)
+        try:
+            yield
+        finally:
+            self._timeout.reschedule(when + loop.time() - start)
+
+
+class CircuitBreaker:
+    """Per-host circuit breaker.
+
+    After `failure_threshold` consecutive transient failures the circuit opens and
+    calls fail fast. Once `reset_timeout` has elapsed a single probe request is let
+    through (half-open); its outcome closes or re-opens the circuit."""
+
+    _by_host: ClassVar[Dict[str, "CircuitBreaker"]] = {}
+
+    def __init__(self, host: str, failure_threshold: int = FAILURE_THRESHOLD, reset_timeout: float = RESET_TIMEOUT):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self._state = STATE_CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.times_opened = 0
+
+    @classmethod
+    def for_host(cls, host: str) -> "CircuitBreaker":
+        if host not in cls._by_host:
+            cls._by_host[host] = cls(host)
+        return cls._by_host[host]
+
+    @property
+    def state(self) -> str:
+        if self._state == STATE_OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = STATE_HALF_OPEN
+        return self._state
+
+    @property
+    def consecutive_failures(self) -> int:
+        return self._failures
+
+    def before_request(self):
+        """Raise if the call must not be sent, mark the half-open probe otherwise."""
+        state = self.state
+        if state == STATE_OPEN:
+            raise SwitchbotCircuitOpenError(f"SwitchBot API at {self.host} is unavailable, not sending request")
+        if state == STATE_HALF_OPEN:
+            if self._probe_in_flight:
+                raise SwitchbotCircuitOpenError(f"SwitchBot API at {self.host} is being probed, not sending request")
+            self._probe_in_flight = True
+
+    def record_success(self):
+        if self._state != STATE_CLOSED:
+            _LOGGER.info(f"SwitchBot API at {self.host} is reachable again, closing circuit")
+        self._state = STATE_CLOSED
+        self._failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        self._failures += 1
+        self._probe_in_flight = False
+        if self._state == STATE_HALF_OPEN or self._failures >= self.failure_threshold:
+            if self._state != STATE_OPEN:
+                _LOGGER.warning(f"Opening circuit for SwitchBot API at {self.host} after {self._failures} failures")
+                self.times_opened += 1
+            self._state = STATE_OPEN
+            self._opened_at = time.monotonic()
+
+    def release(self):
+        """Forget a probe whose outcome says nothing about the API health."""
+        self._probe_in_flight = False
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "times_opened": self.times_opened,
+        }
+
+
+class RetryPolicy:
+    """Async retry loop with exponential backoff, full jitter and a per-call deadline.
+
+    `retry_on` are the transient errors, counted as circuit breaker failures except
+    for `healthy_on` ones, e.g. rate limiting, which say the API is up."""
+
+    def __init__(
+        self,
+        retry_on: Tuple[Type[BaseException], ...],
+        max_tries: int = MAX_TRIES,
+        base_delay: float = BASE_DELAY,
+        max_delay: float = MAX_DELAY,
+        deadline: float = DEFAULT_DEADLINE,
+        healthy_on: Tuple[Type[BaseException], ...] = (),
+    ):
+        self.retry_on = retry_on
+        self.healthy_on = healthy_on
+        self.max_tries = max_tries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.rejected = 0
+
+    def backoff(self, attempt: int) -> float:
+        """Return the delay before retry number `attempt` (starting at 0)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    async def run(
+        self,
+        func: Callable[[Deadline], Awaitable[Any]],
+        breaker: Optional[CircuitBreaker] = None,
+        deadline: Optional[float] = None,
+        retry_on: Optional[Tuple[Type[BaseException], ...]] = None,
+    ) -> Any:
+        """Call `func(deadline)` until it succeeds, raises a non retryable error, or the budget runs out.
+
+        `retry_on` narrows the errors retried for this call, e.g. to those after which a
+        non idempotent request surely did not go through.
+
+        `deadline` (seconds, defaults to the policy deadline) bounds the whole call, retries and
+        backoff included: when it expires the in-flight attempt is cancelled. `func` leaves out
+        the time it spends waiting for its turn with `Deadline.paused`. Cancelling the caller
+        cancels the in-flight attempt as well."""
+        self.calls += 1
+        budget = self.deadline if deadline is None else deadline
+
+        try:
+            async with asyncio.timeout(budget) as timeout:
+                return await self._run(func, breaker, Deadline(timeout), retry_on or self.retry_on)
+        except TimeoutError as exception:
+            if not timeout.expired():
+                raise
+            self.failures += 1
+            if breaker is not None:
+                breaker.record_failure()
+            raise SwitchbotDeadlineExceededError(f"SwitchBot API call did not complete within {budget} s") from exception
+
+    async def _run(
+        self,
+        func: Callable[[Deadline], Awaitable[Any]],
+        breaker: Optional[CircuitBreaker],
+        deadline: Deadline,
+        retry_on: Tuple[Type[BaseException], ...],
+    ) -> Any:
+        for attempt in range(self.max_tries):
+            if breaker is not None:
+                try:
+                    breaker.before_request()
+                except SwitchbotCircuitOpenError:
+                    self.rejected += 1
+                    raise
+
+            try:
+                result = await func(deadline)
+            except self.retry_on as exception:
+                if breaker is not None:
+                    if isinstance(exception, self.healthy_on):
+                        breaker.release()
+                    else:
+                        breaker.record_failure()
+                delay = max(self.backoff(attempt), getattr(exception, "retry_after", 0) or 0)
+                if (
+                    not isinstance(exception, retry_on)
+                    or attempt + 1 >= self.max_tries
+                    or delay >= deadline.remaining
+                ):
+                    self.failures += 1
+                    raise
+                _LOGGER.debug(f"Attempt {attempt + 1} failed with {exception!r}, retrying in {delay:.2f} s")
+                self.retries += 1
+                await asyncio.sleep(delay)
+            except BaseException:
+                if breaker is not None:
+                    breaker.release()
+                raise
+            else:
+                if breaker is not None:
+                    breaker.record_success()
+                return result
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "max_tries": self.max_tries,
+            "base_delay": self.base_delay,
+            "max_delay": self.max_delay,
+            "deadline": self.deadline,
+            "calls": self.calls,
+            "retries": self.retries,
+            "failures": self.failures,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,199 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, ClassVar, Dict, List, Optional
+
+from homeassistant.exceptions import HomeAssistantError
+
+_LOGGER = logging.getLogger(__name__)
+
+DAILY_QUOTA = 10000
+
+# Token bucket smoothing bursts of calls
+BURST_SIZE = 10
+REFILL_RATE = 2.0
+
+# Priority lanes, lower is served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_AUTOMATION = 1
+PRIORITY_BACKGROUND = 2
+
+# Below these fractions of the daily quota, background calls are shed and
+# automation calls are paced so the remaining budget lasts until the reset.
+BACKGROUND_RESERVE = 0.25
+AUTOMATION_RESERVE = 0.10
+
+
+class SwitchbotQuotaExceededError(HomeAssistantError):
+    """Exception raised when a call is shed to protect the daily API quota"""
+
+
+def priority_for_context(context: Any) -> int:
+    """Map a Home Assistant context to a lane: user initiated calls are interactive."""
+    if context is not None and getattr(context, "user_id", None):
+        return PRIORITY_INTERACTIVE
+    return PRIORITY_AUTOMATION
+
+
+def utc_day() -> str:
+    return datetime.now(timezone.utc).date().isoformat()
+
+
+def seconds_until_reset() -> float:
+    now = datetime.now(timezone.utc)
+    tomorrow = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), tzinfo=timezone.utc)
+    return (tomorrow - now).total_seconds()
+
+
+class QuotaScheduler:
+    """Token bucket scheduler enforcing the per-token daily quota of the SwitchBot API.
+
+    Calls wait for a token in priority order. When the remaining daily budget runs
+    low, background calls are rejected and automation calls are spread over the
+    rest of the day; interactive calls always go first."""
+
+    _by_token: ClassVar[Dict[str, "QuotaScheduler"]] = {}
+
+    def __init__(self, daily_quota: int = DAILY_QUOTA, burst_size: int = BURST_SIZE, refill_rate: float = REFILL_RATE):
+        self.daily_quota = daily_quota
+        self.burst_size = burst_size
+        self.refill_rate = refill_rate
+
+        self.day = utc_day()
+        self.used_today = 0
+        self.shed = 0
+        self.deferred = 0
+
+        self._tokens = float(burst_size)
+        self._refilled_at = time.monotonic()
+        self._last_automation_grant = 0.0
+        self._waiters: List[list] = []
+        self._counter = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    @classmethod
+    def for_token(cls, token: str) -> "QuotaScheduler":
+        if token not in cls._by_token:
+            cls._by_token[token] = cls()
+        return cls._by_token[token]
+
+    @property
+    def remaining(self) -> int:
+        self.roll_day()
+        return max(0, self.daily_quota - self.used_today)
+
+    def restore(self, day: str, used_today: int):
+        """Resume the daily count from persisted accounting."""
+        if day == utc_day():
+            self.day = day
+            self.used_today = max(self.used_today, used_today)
+
+    async def acquire(self, priority: int = PRIORITY_AUTOMATION, max_wait: Optional[float] = None):
+        """Wait until the call may be sent, or raise if it has to be shed.
+
+        With `max_wait`, a call that the daily pacing would hold back longer than
+        that many seconds is shed right away rather than left to time out."""
+        remaining = self.remaining
+        if remaining <= 0:
+            self.shed += 1
+            raise SwitchbotQuotaExceededError(f"SwitchBot daily API quota of {self.daily_quota} calls is exhausted")
+        if priority >= PRIORITY_BACKGROUND and remaining < self.daily_quota * BACKGROUND_RESERVE:
+            self.shed += 1
+            raise SwitchbotQuotaExceededError(f"Skipping background call, only {remaining} SwitchBot API calls left today")
+        if max_wait is not None and priority >= PRIORITY_AUTOMATION and (wait := self._paced_wait(priority)) > max_wait:
+            self.shed += 1
+            raise SwitchbotQuotaExceededError(
+                f"Skipping call paced {wait:.0f} s away, only {remaining} SwitchBot API calls left today"
+            )
+
+        waiter = [priority, next(self._counter), asyncio.get_running_loop().create_future(), False]
+        heapq.heappush(self._waiters, waiter)
+        self._dispatch()
+        try:
+            await waiter[2]
+        except asyncio.CancelledError:
+            if waiter[2].done() and not waiter[2].cancelled():
+                self.refund()
+            raise
+
+    def refund(self):
+        """Give back a token granted to a call that ended up not being sent."""
+        self._tokens = min(self.burst_size, self._tokens + 1)
+        self.used_today = max(0, self.used_today - 1)
+        self._dispatch()
+
+    def roll_day(self):
+        """Start counting a new day once the UTC date has changed."""
+        day = utc_day()
+        if day != self.day:
+            self.day = day
+            self.used_today = 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst_size, self._tokens + (now - self._refilled_at) * self.refill_rate)
+        self._refilled_at = now
+
+    def _automation_interval(self) -> float:
+        remaining = self.remaining
+        if remaining >= self.daily_quota * AUTOMATION_RESERVE:
+            return 0
+        return seconds_until_reset() / max(remaining, 1)
+
+    def _paced_wait(self, priority: int) -> float:
+        """Return how long the daily pacing would hold back a new call of the `priority` lane."""
+        interval = self._automation_interval()
+        if not interval:
+            return 0.0
+        ahead = sum(
+            1 for waiter in self._waiters
+            if PRIORITY_AUTOMATION <= waiter[0] <= priority and not waiter[2].done()
+        )
+        return self._last_automation_grant + interval * (ahead + 1) - time.monotonic()
+
+    def _dispatch(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        self._refill()
+        while self._waiters:
+            waiter = self._waiters[0]
+            priority, _, future, deferred = waiter
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+
+            wait = 0.0
+            if self._tokens < 1:
+                wait = (1 - self._tokens) / self.refill_rate
+            if priority >= PRIORITY_AUTOMATION:
+                interval = self._automation_interval()
+                wait = max(wait, self._last_automation_grant + interval - time.monotonic())
+            if wait > 0:
+                if priority >= PRIORITY_AUTOMATION and self._tokens >= 1 and not deferred:
+                    waiter[3] = True
+                    self.deferred += 1
+                self._timer = asyncio.get_running_loop().call_later(wait, self._dispatch)
+                return
+
+            heapq.heappop(self._waiters)
+            self._tokens -= 1
+            self.used_today += 1
+            if priority >= PRIORITY_AUTOMATION:
+                self._last_automation_grant = time.monotonic()
+            future.set_result(None)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "day": self.day,
+            "daily_quota": self.daily_quota,
+            "used_today": self.used_today,
+            "remaining": self.remaining,
+            "waiting": sum(1 for waiter in self._waiters if not waiter[2].done()),
+            "shed": self.shed,
+            "deferred": self.deferred,
+        }
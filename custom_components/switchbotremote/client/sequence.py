@@ -0,0 +1,86 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, List, Optional, Sequence, Tuple, TypeVar
+
+from .remote import Remote
+from .scheduler import PRIORITY_INTERACTIVE
+
+_LOGGER = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class CommandSequence:
+    """Multi-step operation owned by an entity, e.g. stepping the brightness.
+
+    Running a sequence cancels the one still in progress. The steps that one got
+    acknowledged are kept, so the new sequence starts from where the device is."""
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        # Bumped by every run, so only the latest one starts once the previous has unwound
+        self._generation = 0
+
+    async def run(self, func: Callable[[], Awaitable[T]]) -> Optional[T]:
+        """Run `func()` as the current sequence; returns None if it got superseded."""
+        self._generation += 1
+        generation = self._generation
+
+        previous = self._task
+        if previous is not None and not previous.done():
+            _LOGGER.debug("Superseding a running command sequence")
+            previous.cancel()
+            # Let it unwind so the position it reached is up to date
+            await asyncio.wait([previous])
+
+        if generation != self._generation:
+            # A newer sequence came in while the previous one unwound
+            return None
+
+        task = asyncio.ensure_future(func())
+        self._task = task
+        try:
+            return await task
+        except asyncio.CancelledError:
+            if asyncio.current_task().cancelling():
+                raise
+            # Superseded by a newer sequence, not an error for the caller
+            return None
+        finally:
+            if self._task is task:
+                self._task = None
+
+    def cancel(self):
+        self._generation += 1
+        if self._task is not None:
+            self._task.cancel()
+
+
+def _consume_result(task: asyncio.Task):
+    if not task.cancelled():
+        task.exception()
+
+
+async def pipeline(
+    remote: Remote,
+    steps: Sequence[Tuple],
+    on_step: Callable[[int], None],
+    priority: int = PRIORITY_INTERACTIVE,
+):
+    """Queue every step (`Remote.command` arguments) on the hub channel at once and
+    call `on_step(index)` as each one is acknowledged, in order.
+
+    Stops at the first failure or cancellation; the steps not sent yet are dropped."""
+    tasks: List[asyncio.Task] = []
+    for step in steps:
+        task = asyncio.ensure_future(remote.command(*step, priority=priority))
+        task.add_done_callback(_consume_result)
+        tasks.append(task)
+
+    try:
+        for index, task in enumerate(tasks):
+            await task
+            on_step(index)
+    finally:
+        for task in tasks:
+            task.cancel()
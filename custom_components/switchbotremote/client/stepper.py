@@ -0,0 +1,115 @@
+import math
+from typing import Callable, List, Optional, Tuple
+
+from .remote import Remote
+from .scheduler import PRIORITY_INTERACTIVE
+from .sequence import pipeline
+
+# Digits kept on the values, float steps like 0.1 otherwise drift press after press
+PRECISION = 9
+
+# Resync endpoints
+NEAREST = "nearest"
+MINIMUM = "minimum"
+MAXIMUM = "maximum"
+
+
+class SteppedValue:
+    """Absolute value of a device only driven by relative up/down IR commands.
+
+    The value moves `step` per press and saturates at `minimum` and `maximum`.
+    When it is unknown, or a resync is asked for, it is first driven to an
+    endpoint by pressing enough times to cover the whole range."""
+
+    def __init__(
+        self,
+        minimum: float,
+        maximum: float,
+        step: float,
+        value: Optional[float] = None,
+        resync_to: str = NEAREST,
+    ):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.step = step
+        self.value = value
+        self.resync_to = resync_to
+
+    def clamp(self, value: float) -> float:
+        return min(self.maximum, max(self.minimum, value))
+
+    def advance(self, value: float, direction: int) -> float:
+        """Return the value after one press from `value`."""
+        return self.clamp(round(value + direction * self.step, PRECISION))
+
+    @property
+    def range_presses(self) -> int:
+        """Presses taking the value from one endpoint to the other."""
+        # Rounded first so that float steps like 1/20 do not add a press
+        return math.ceil(round((self.maximum - self.minimum) / self.step, 6))
+
+    def _presses(self, start: float, target: float) -> int:
+        """Signed number of presses from `start` ending closest to `target`."""
+        distance = target - start
+        if target in (self.minimum, self.maximum):
+            # Extra presses are harmless at an endpoint, make sure to get there
+            return int(math.copysign(math.ceil(abs(distance) / self.step), distance))
+        return round(distance / self.step)
+
+    def _endpoint(self, target: float) -> float:
+        if self.resync_to == MINIMUM:
+            return self.minimum
+        if self.resync_to == MAXIMUM:
+            return self.maximum
+        return self.minimum if target - self.minimum <= self.maximum - target else self.maximum
+
+    def plan(self, target: float, resync: bool = False) -> List[Tuple[int, Optional[float]]]:
+        """Return the fewest presses reaching `target`, as (direction, value once acknowledged)."""
+        target = self.clamp(target)
+        presses: List[Tuple[int, Optional[float]]] = []
+        value = self.value
+
+        if value is None or resync:
+            endpoint = self._endpoint(target)
+            direction = 1 if endpoint == self.maximum else -1
+            count = self.range_presses
+            presses.extend((direction, None) for _ in range(count - 1))
+            presses.append((direction, endpoint))
+            value = endpoint
+
+        count = self._presses(value, target)
+        direction = 1 if count > 0 else -1
+        for _ in range(abs(count)):
+            value = self.advance(value, direction)
+            presses.append((direction, value))
+
+        return presses
+
+    def moved(self, direction: int):
+        """Account for a press made outside of `step_to`, e.g. a volume up."""
+        if self.value is not None:
+            self.value = self.advance(self.value, direction)
+
+
+async def step_to(
+    remote: Remote,
+    stepped: SteppedValue,
+    target: float,
+    down: Tuple,
+    up: Tuple,
+    on_change: Optional[Callable[[], None]] = None,
+    priority: int = PRIORITY_INTERACTIVE,
+    resync: bool = False,
+):
+    """Drive `stepped` to `target` with the `down` and `up` commands (`Remote.command` arguments).
+
+    The presses are pipelined on the hub channel; `stepped.value` follows each
+    acknowledged press, so a cancelled run leaves it where the device is."""
+    presses = stepped.plan(target, resync)
+
+    def _stepped(index: int):
+        stepped.value = presses[index][1]
+        if on_change is not None:
+            on_change()
+
+    await pipeline(remote, [up if direction > 0 else down for direction, _ in presses], _stepped, priority)
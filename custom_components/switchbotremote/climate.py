@@ -1,6 +1,9 @@
+import asyncio
 import logging
 from homeassistant.components.climate import ClimateEntity
 from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.event import async_track_state_change_event
 from homeassistant.helpers.restore_state import RestoreEntity
 from homeassistant.components.climate.const import (
@@ -15,11 +18,15 @@ from homeassistant.const import STATE_UNAVAILABLE, STATE_UNKNOWN, STATE_OFF, STA
 from homeassistant.const import UnitOfTemperature
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.config_entries import ConfigEntry
-from .client.remote import SupportedRemote
+from .client.remote import SHADOW_POWER, SupportedRemote
+from .client.scheduler import PRIORITY_BACKGROUND, priority_for_context
+from .coordinator import HubStatusCoordinator
+from .data import RemotesByClass, SwitchBotRemoteData
+from .pacing import async_expect_power
 
 from .const import (
     DOMAIN,
-    IR_CLIMATE_TYPES,
+    SIGNAL_ADD_REMOTES,
     AIR_CONDITIONER_CLASS,
     CONF_POWER_SENSOR,
     CONF_TEMPERATURE_SENSOR,
@@ -53,14 +60,20 @@ FAN_REMOTE_MODES = {
 DEFAULT_MIN_TEMP = 16
 DEFAULT_MAX_TEMP = 30
 
+# Changes made within this window, e.g. while dragging the thermostat slider,
+# are sent as a single setAll with the final values.
+COALESCE_WINDOW = 1.0
+
 
 class SwitchBotRemoteClimate(ClimateEntity, RestoreEntity):
     _attr_has_entity_name = False
+    _attr_should_poll = False
     _attr_force_update = True
 
-    def __init__(self, sb: SupportedRemote, options: dict = {}) -> None:
+    def __init__(self, sb: SupportedRemote, options: dict = {}, hub_status: HubStatusCoordinator | None = None) -> None:
         super().__init__()
         self.sb = sb
+        self._hub_status = hub_status
         self._unique_id = sb.id
         self._device_name = sb.name
         self._is_on = False
@@ -96,6 +109,12 @@ class SwitchBotRemoteClimate(ClimateEntity, RestoreEntity):
         self._current_temperature = None
         self._current_humidity = None
 
+        self._debouncer: Debouncer | None = None
+        self._pending_priority = PRIORITY_BACKGROUND
+        self._pending_force = False
+        # Outcome of the coalesced setAll, awaited by every change it carries
+        self._pending_send: asyncio.Future | None = None
+
         # ClimateEntityFeature migration done
         # This line will be removed after deprecation period (until 2025.1)
         # https://developers.home-assistant.io/blog/2024/01/24/climate-climateentityfeatures-expanded/
@@ -203,13 +222,13 @@ class SwitchBotRemoteClimate(ClimateEntity, RestoreEntity):
             'last_on_operation': self._last_on_operation
         }
 
-    def turn_off(self):
+    async def async_turn_off(self, force: bool = False):
         """Turn off."""
-        self.set_hvac_mode(HVACMode.OFF)
+        await self._async_set_hvac_mode(HVACMode.OFF, force)
 
-    def turn_on(self):
+    async def async_turn_on(self, force: bool = False):
         """Turn on."""
-        self.set_hvac_mode(self._last_on_operation or HVACMode.COOL)
+        await self._async_set_hvac_mode(self._last_on_operation or HVACMode.COOL, force)
 
     def set_supported_features(self):
         if self.hvac_mode == HVACMode.DRY or self.hvac_mode == HVACMode.FAN_ONLY:
@@ -219,33 +238,77 @@ class SwitchBotRemoteClimate(ClimateEntity, RestoreEntity):
         else:
             self._supported_features = ClimateEntityFeature.TURN_OFF | ClimateEntityFeature.TURN_ON | ClimateEntityFeature.TARGET_TEMPERATURE | ClimateEntityFeature.FAN_MODE
 
-    def set_temperature(self, **kwargs):
+    async def async_set_temperature(self, **kwargs):
         self._target_temperature = kwargs.get("temperature")
 
-        self._update_remote()
+        await self._async_update_remote()
 
-    def set_hvac_mode(self, hvac_mode):
+    async def async_set_hvac_mode(self, hvac_mode):
         """Set new target hvac mode."""
+        await self._async_set_hvac_mode(hvac_mode)
+
+    async def _async_set_hvac_mode(self, hvac_mode, force: bool = False):
+        """Set the hvac mode, with `force` sending it even if the remote believes it is set."""
         if hvac_mode == HVACMode.OFF and self._override_off_command:
-            self.sb.turn("off")
+            if await self.sb.turn("off", priority=priority_for_context(self._context), force=force):
+                async_expect_power(self.hass, self.sb, self._power_sensor, on=False)
+            # A pending setAll sees the unit off and is not sent
             self._is_on = False
         else:
             self._last_on_operation = hvac_mode
 
         self._is_on = True
         self._hvac_mode = hvac_mode
-        self._update_remote()
+        self._pending_force = self._pending_force or force
+        await self._async_update_remote()
 
-    def set_fan_mode(self, fan_mode):
+    async def async_set_fan_mode(self, fan_mode):
         self._fan_mode = fan_mode
-        self._update_remote()
+        await self._async_update_remote()
 
-    def _update_remote(self):
+    async def _async_update_remote(self):
+        """Show the new state right away and send it once the coalescing window closes."""
         self.set_supported_features()
+        self._pending_priority = min(self._pending_priority, priority_for_context(self._context))
+        if self._debouncer is None:
+            await self._async_send_remote()
+            return
+
+        self.async_write_ha_state()
+        if self._pending_send is None:
+            self._pending_send = self.hass.loop.create_future()
+            # Nobody may be left waiting for the outcome
+            self._pending_send.add_done_callback(lambda future: future.cancelled() or future.exception())
+        pending = self._pending_send
+        await self._debouncer.async_call()
+        # Shielded, a caller going away does not cancel the send of the others
+        await asyncio.shield(pending)
+
+    async def _async_flush_remote(self):
+        """Send the coalesced changes and hand the outcome to their callers."""
+        pending, self._pending_send = self._pending_send, None
+        try:
+            await self._async_send_remote()
+        except Exception as exception:
+            if pending is not None:
+                pending.set_exception(exception)
+            else:
+                raise
+        else:
+            if pending is not None:
+                pending.set_result(None)
+
+    async def _async_send_remote(self):
+        priority, self._pending_priority = self._pending_priority, PRIORITY_BACKGROUND
+        force, self._pending_force = self._pending_force, False
         if (self._hvac_mode != HVACMode.OFF and self._override_off_command):
-            self.sb.command(
+            await self.sb.command(
                 "setAll",
                 f"{int(self.target_temperature)},{HVAC_REMOTE_MODES[self.hvac_mode]},{FAN_REMOTE_MODES[self.fan_mode]},{self.power_state}",
+                priority=priority,
+                force=force,
+                # setAll carries the power state as well, re-selecting the same settings is a no-op
+                shadow=SHADOW_POWER,
             )
 
     @callback
@@ -284,11 +347,28 @@ class SwitchBotRemoteClimate(ClimateEntity, RestoreEntity):
         self._async_update_humidity(new_state)
         await self.async_update_ha_state(force_refresh=True)
 
+    @callback
+    def _async_update_from_hub(self):
+        """Use the readings of the hub for the values without a sensor of their own."""
+        readings = (self._hub_status.data or {}).get(self.sb.hub_id, {})
+        if not self._temperature_sensor and "temperature" in readings:
+            self._current_temperature = readings["temperature"]
+        if not self._humidity_sensor and "humidity" in readings:
+            self._current_humidity = readings["humidity"]
+
+    @callback
+    def _async_hub_status_updated(self):
+        self._async_update_from_hub()
+        self.async_write_ha_state()
+
     @callback
     def _async_update_power(self, state):
         """Update thermostat with latest state from temperature sensor."""
         try:
             if state.state != STATE_UNKNOWN and state.state != STATE_UNAVAILABLE:
+                if (state.state == STATE_ON) != self._is_on:
+                    # The unit was switched outside of Home Assistant
+                    self.sb.forget(SHADOW_POWER)
                 if state.state == STATE_OFF:
                     self._is_on = False
                     self._hvac_mode = HVACMode.OFF
@@ -307,10 +387,21 @@ class SwitchBotRemoteClimate(ClimateEntity, RestoreEntity):
         self._async_update_power(new_state)
         await self.async_update_ha_state(force_refresh=True)
 
+    async def async_will_remove_from_hass(self):
+        """Send the changes still in the coalescing window rather than dropping them."""
+        if self._pending_send is not None:
+            self._debouncer.async_cancel()
+            await self._async_flush_remote()
+
     async def async_added_to_hass(self):
         """Run when entity about to be added."""
         await super().async_added_to_hass()
 
+        self._debouncer = Debouncer(
+            self.hass, _LOGGER, cooldown=COALESCE_WINDOW, immediate=False, function=self._async_flush_remote
+        )
+        self.async_on_remove(self._debouncer.async_shutdown)
+
         last_state = await self.async_get_last_state()
 
         if last_state is not None:
@@ -321,25 +412,35 @@ class SwitchBotRemoteClimate(ClimateEntity, RestoreEntity):
             self._last_on_operation = last_state.attributes.get(
                 'last_on_operation')
 
+        if self._hub_status is not None and not (self._temperature_sensor and self._humidity_sensor):
+            self.async_on_remove(self._hub_status.async_add_listener(self._async_hub_status_updated))
+            self._async_update_from_hub()
+
         if self._temperature_sensor:
-            async_track_state_change_event(
-                self.hass, [self._temperature_sensor], self._async_temp_sensor_changed)
+            self.async_on_remove(
+                async_track_state_change_event(
+                    self.hass, [self._temperature_sensor], self._async_temp_sensor_changed)
+            )
 
             temp_sensor_state = self.hass.states.get(self._temperature_sensor)
             if temp_sensor_state and temp_sensor_state.state != STATE_UNKNOWN:
                 self._async_update_temp(temp_sensor_state)
 
         if self._humidity_sensor:
-            async_track_state_change_event(
-                self.hass, [self._humidity_sensor], self._async_humidity_sensor_changed)
+            self.async_on_remove(
+                async_track_state_change_event(
+                    self.hass, [self._humidity_sensor], self._async_humidity_sensor_changed)
+            )
 
             humidity_sensor_state = self.hass.states.get(self._humidity_sensor)
             if humidity_sensor_state and humidity_sensor_state.state != STATE_UNKNOWN:
                 self._async_update_humidity(humidity_sensor_state)
 
         if self._power_sensor:
-            async_track_state_change_event(
-                self.hass, [self._power_sensor], self._async_power_sensor_changed)
+            self.async_on_remove(
+                async_track_state_change_event(
+                    self.hass, [self._power_sensor], self._async_power_sensor_changed)
+            )
 
             power_sensor_state = self.hass.states.get(self._power_sensor)
             if power_sensor_state and power_sensor_state.state != STATE_UNKNOWN:
@@ -347,13 +448,25 @@ class SwitchBotRemoteClimate(ClimateEntity, RestoreEntity):
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities) -> bool:
-    remotes = hass.data[DOMAIN][entry.entry_id]
+    data: SwitchBotRemoteData = hass.data[DOMAIN][entry.entry_id]
 
-    entities = [
-        SwitchBotRemoteClimate(remote, entry.data.get(remote.id, {}))
-        for remote in filter(lambda r: r.type in IR_CLIMATE_TYPES, remotes)
-    ]
+    @callback
+    def async_add_remotes(by_class: RemotesByClass):
+        entities = [
+            SwitchBotRemoteClimate(
+                remote,
+                entry.data.get(remote.id, {}),
+                # Hubs with sensors give a reading without configuring one
+                data.coordinator if remote.hub_id in data.sensor_hubs else None,
+            )
+            for remote in by_class.get(AIR_CONDITIONER_CLASS, [])
+        ]
+        data.track(entities)
+        async_add_entities(entities)
 
-    async_add_entities(entities)
+    async_add_remotes(data.by_class)
+    entry.async_on_unload(
+        async_dispatcher_connect(hass, SIGNAL_ADD_REMOTES.format(entry.entry_id), async_add_remotes)
+    )
 
     return True
@@ -7,27 +7,41 @@ from typing import Any
 import voluptuous as vol
 
 from homeassistant import config_entries
+from homeassistant.components import webhook
 from homeassistant.components.climate.const import HVACMode
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.exceptions import ConfigEntryAuthFailed, HomeAssistantError
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.helpers.selector import selector
 
 from .client import SwitchBot, switchbot_host
+from .client.dispatcher import COMMAND_GAP
+from .client.macro import MacroError
+from .data import SwitchBotRemoteData
+from .macros import validate_macros
+from .reconcile import async_refresh
 from .const import (
     AIR_CONDITIONER_CLASS,
     CAMERA_CLASS,
     CLASS_BY_TYPE,
+    CONF_COMMAND_GAP,
     CONF_CUSTOMIZE_COMMANDS,
+    CONF_DISCOVERY_INTERVAL,
     CONF_HUMIDITY_SENSOR,
     CONF_HVAC_MODES,
+    CONF_MACROS,
     CONF_OFF_COMMAND,
     CONF_ON_COMMAND,
     CONF_OVERRIDE_OFF_COMMAND,
     CONF_POWER_SENSOR,
+    CONF_REFRESH_DEVICES,
     CONF_TEMP_MAX,
     CONF_TEMP_MIN,
     CONF_TEMP_STEP,
+    CONF_VOLUME_STEPS,
+    CONF_WEBHOOK,
+    CONF_WEBHOOK_ID,
     CONF_TEMPERATURE_SENSOR,
     CONF_WITH_BRIGHTNESS,
     CONF_WITH_ION,
@@ -79,6 +93,9 @@ STEP_USER_DATA_SCHEMA = vol.Schema(
         vol.Required("name"): str,
         vol.Required("token"): str,
         vol.Required("secret"): str,
+        vol.Optional(CONF_DISCOVERY_INTERVAL, default=0): vol.All(int, vol.Range(min=0)),
+        vol.Optional(CONF_COMMAND_GAP, default=COMMAND_GAP): vol.All(vol.Coerce(float), vol.Range(min=0, max=10)),
+        vol.Optional(CONF_WEBHOOK, default=False): bool,
     }
 )
 
@@ -93,9 +110,11 @@ STEP_CONFIGURE_DEVICE = {
         vol.Optional(CONF_TEMP_STEP, default=x.get(CONF_TEMP_STEP, 1.0)): selector({"number": {"min": 1.0, "max": 5.0, "step": 1.0, "mode": "slider"}}),
         vol.Optional(CONF_HVAC_MODES, description={"suggested_value": x.get(CONF_HVAC_MODES, DEFAULT_HVAC_MODES)}): vol.All(selector({"select": {"multiple": True, "options": HVAC_MODES}})),
         vol.Optional(CONF_CUSTOMIZE_COMMANDS, default=x.get(CONF_CUSTOMIZE_COMMANDS, [])): selector({"select": {"multiple": True, "custom_value": True, "options": []}}),
+        vol.Optional(CONF_MACROS, default=x.get(CONF_MACROS, [])): selector({"select": {"multiple": True, "custom_value": True, "options": []}}),
     }),
     MEDIA_CLASS: lambda x, device_type=None: vol.Schema({
         vol.Optional(CONF_POWER_SENSOR, description={"suggested_value": x.get(CONF_POWER_SENSOR)}): selector({"entity": {"filter": {"domain": ["binary_sensor", "input_boolean", "light", "sensor", "switch"]}}}),
+        vol.Optional(CONF_VOLUME_STEPS, default=x.get(CONF_VOLUME_STEPS, 0)): vol.All(int, vol.Range(min=0, max=100)),
         vol.Optional(CONF_CUSTOMIZE_COMMANDS, default=x.get(CONF_CUSTOMIZE_COMMANDS, [])): selector({
             "select": {
                 "multiple": True,
@@ -103,6 +122,7 @@ STEP_CONFIGURE_DEVICE = {
                 "options": MEDIA_EXTRA_COMMANDS.get(device_type.replace("DIY ", ""), []) if device_type else []
             }
         }),
+        vol.Optional(CONF_MACROS, default=x.get(CONF_MACROS, [])): selector({"select": {"multiple": True, "custom_value": True, "options": []}}),
     }),
     FAN_CLASS: lambda x: vol.Schema({
         vol.Optional(CONF_POWER_SENSOR, description={"suggested_value": x.get(CONF_POWER_SENSOR)}): selector({"entity": {"filter": {"domain": ["binary_sensor", "input_boolean", "light", "sensor", "switch"]}}}),
@@ -110,18 +130,22 @@ STEP_CONFIGURE_DEVICE = {
         vol.Optional(CONF_WITH_ION, default=x.get(CONF_WITH_ION, False)): bool,
         vol.Optional(CONF_WITH_TIMER, default=x.get(CONF_WITH_TIMER, False)): bool,
         vol.Optional(CONF_CUSTOMIZE_COMMANDS, default=x.get(CONF_CUSTOMIZE_COMMANDS, [])): selector({"select": {"multiple": True, "custom_value": True, "options": []}}),
+        vol.Optional(CONF_MACROS, default=x.get(CONF_MACROS, [])): selector({"select": {"multiple": True, "custom_value": True, "options": []}}),
     }),
     LIGHT_CLASS: lambda x: vol.Schema({
         vol.Optional(CONF_POWER_SENSOR, description={"suggested_value": x.get(CONF_POWER_SENSOR)}): selector({"entity": {"filter": {"domain": ["binary_sensor", "input_boolean", "light", "sensor", "switch"]}}}),
         vol.Optional(CONF_WITH_BRIGHTNESS, default=x.get(CONF_WITH_BRIGHTNESS, False)): bool,
         vol.Optional(CONF_WITH_TEMPERATURE, default=x.get(CONF_WITH_TEMPERATURE, False)): bool,
         vol.Optional(CONF_CUSTOMIZE_COMMANDS, default=x.get(CONF_CUSTOMIZE_COMMANDS, [])): selector({"select": {"multiple": True, "custom_value": True, "options": []}}),
+        vol.Optional(CONF_MACROS, default=x.get(CONF_MACROS, [])): selector({"select": {"multiple": True, "custom_value": True, "options": []}}),
     }),
     CAMERA_CLASS: lambda x: vol.Schema({
         vol.Optional(CONF_CUSTOMIZE_COMMANDS, default=x.get(CONF_CUSTOMIZE_COMMANDS, [])): selector({"select": {"multiple": True, "custom_value": True, "options": []}}),
+        vol.Optional(CONF_MACROS, default=x.get(CONF_MACROS, [])): selector({"select": {"multiple": True, "custom_value": True, "options": []}}),
     }),
     VACUUM_CLASS: lambda x: vol.Schema({
         vol.Optional(CONF_CUSTOMIZE_COMMANDS, default=x.get(CONF_CUSTOMIZE_COMMANDS, [])): selector({"select": {"multiple": True, "custom_value": True, "options": []}}),
+        vol.Optional(CONF_MACROS, default=x.get(CONF_MACROS, [])): selector({"select": {"multiple": True, "custom_value": True, "options": []}}),
     }),
     WATER_HEATER_CLASS: lambda x: vol.Schema({
         vol.Optional(CONF_POWER_SENSOR, description={"suggested_value": x.get(CONF_POWER_SENSOR)}): selector({"entity": {"filter": {"domain": ["binary_sensor", "input_boolean", "light", "sensor", "switch"]}}}),
@@ -129,12 +153,14 @@ STEP_CONFIGURE_DEVICE = {
         vol.Optional(CONF_TEMP_MIN, default=x.get(CONF_TEMP_MIN, 40)): int,
         vol.Optional(CONF_TEMP_MAX, default=x.get(CONF_TEMP_MAX, 65)): int,
         vol.Optional(CONF_CUSTOMIZE_COMMANDS, default=x.get(CONF_CUSTOMIZE_COMMANDS, [])): selector({"select": {"multiple": True, "custom_value": True, "options": []}}),
+        vol.Optional(CONF_MACROS, default=x.get(CONF_MACROS, [])): selector({"select": {"multiple": True, "custom_value": True, "options": []}}),
     }),
     OTHERS_CLASS: lambda x: vol.Schema({
         vol.Optional(CONF_POWER_SENSOR, description={"suggested_value": x.get(CONF_POWER_SENSOR)}): selector({"entity": {"filter": {"domain": ["binary_sensor", "input_boolean", "light", "sensor", "switch"]}}}),
         vol.Optional(CONF_ON_COMMAND, default=x.get(CONF_ON_COMMAND, "")): str,
         vol.Optional(CONF_OFF_COMMAND, default=x.get(CONF_OFF_COMMAND, "")): str,
         vol.Optional(CONF_CUSTOMIZE_COMMANDS, default=x.get(CONF_CUSTOMIZE_COMMANDS, [])): selector({"select": {"multiple": True, "custom_value": True, "options": []}}),
+        vol.Optional(CONF_MACROS, default=x.get(CONF_MACROS, [])): selector({"select": {"multiple": True, "custom_value": True, "options": []}}),
     }),
 }
 
@@ -143,11 +169,12 @@ async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str,
     switchbot = SwitchBot(
         token=data["token"], 
         secret=data["secret"], 
+        session=async_get_clientsession(hass),
         host=data.get("host", switchbot_host)
     )
 
     try:
-        remotes = await hass.async_add_executor_job(switchbot.remotes)
+        remotes = await switchbot.remotes()
         _LOGGER.debug(f"Found remotes: {remotes}")
         return {"title": data["name"], "remotes": remotes}
     except Exception as exception:
@@ -170,8 +197,11 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             name = user_input["name"]
             uniq_id = f"switchbot_remote_{name}"
             await self.async_set_unique_id(uniq_id)
+            entry = self._get_reconfigure_entry()
+            if user_input.get(CONF_WEBHOOK) and CONF_WEBHOOK_ID not in entry.data:
+                user_input[CONF_WEBHOOK_ID] = webhook.async_generate_id()
             return self.async_update_reload_and_abort(
-                self._get_reconfigure_entry(),
+                entry,
                 data_updates=user_input,
             )
 
@@ -185,6 +215,13 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                     vol.Required("name", default=old_entry.data['name']): str,
                     vol.Required("token", default=old_entry.data['token']): str,
                     vol.Required("secret", default=old_entry.data['secret']): str,
+                    vol.Optional(
+                        CONF_DISCOVERY_INTERVAL, default=old_entry.data.get(CONF_DISCOVERY_INTERVAL, 0)
+                    ): vol.All(int, vol.Range(min=0)),
+                    vol.Optional(
+                        CONF_COMMAND_GAP, default=old_entry.data.get(CONF_COMMAND_GAP, COMMAND_GAP)
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0, max=10)),
+                    vol.Optional(CONF_WEBHOOK, default=old_entry.data.get(CONF_WEBHOOK, False)): bool,
                 }
             )
         )
@@ -206,6 +243,8 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 name = info["title"]
                 uniq_id = f"switchbot_remote_{name}"
                 await self.async_set_unique_id(uniq_id)
+                if user_input.get(CONF_WEBHOOK):
+                    user_input[CONF_WEBHOOK_ID] = webhook.async_generate_id()
                 return self.async_create_entry(title=name, data=user_input)
 
         return self.async_show_form(step_id="user", data_schema=STEP_USER_DATA_SCHEMA)
@@ -219,11 +258,6 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
         self.config_entry = config_entry
 
         self.data = config_entry.data
-        self.sb = SwitchBot(
-            token=self.data["token"],
-            secret=self.data["secret"],
-            host=self.data.get("host", switchbot_host)
-        )
         self.discovered_devices = []
         self.selected_device = None
         self.current_device_type = None
@@ -231,6 +265,21 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
 
     async def async_step_init(self, user_input: dict[str, Any] | None = None) -> FlowResult:
         """Manage the options."""
+        errors: dict[str, str] = {}
+        data: SwitchBotRemoteData | None = self.hass.data.get(DOMAIN, {}).get(self.config_entry.entry_id)
+
+        if user_input is not None and user_input.get(CONF_REFRESH_DEVICES) and data is not None:
+            try:
+                await async_refresh(self.hass, self.config_entry, data)
+            except Exception as exception:
+                _LOGGER.error(f"Failed to refresh devices: {exception}")
+                errors["base"] = "cannot_connect"
+            # The selection was made from the old list, pick again from the new one
+            user_input = None
+        elif user_input is not None and not user_input.get("selected_device"):
+            errors["base"] = "no_device_selected"
+            user_input = None
+
         if user_input is not None:
             self.selected_device = user_input["selected_device"]
             for remote in self.discovered_devices:
@@ -240,22 +289,53 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
             _LOGGER.debug(f"Selected device: {self.selected_device}, Type: {self.current_device_type}")
             return await self.async_step_edit_device()
 
-        try:
-            self.discovered_devices = await self.hass.async_add_executor_job(self.sb.remotes)
-            _LOGGER.debug(f"Discovered devices: {self.discovered_devices}")
-        except Exception as exception:
-            _LOGGER.error(f"Failed to discover devices: {exception}")
-            raise ConfigEntryAuthFailed from exception
+        if data is not None:
+            # The running entry already knows the remotes
+            self.discovered_devices = data.remotes
+        elif not self.discovered_devices:
+            # Entry not loaded, e.g. after a failed setup
+            self.discovered_devices = await self._async_fetch_remotes()
+        _LOGGER.debug(f"Discovered devices: {self.discovered_devices}")
 
         devices = dict()
         for remote in self.discovered_devices:
             devices[remote.id] = remote.name
 
-        return self.async_show_form(step_id="init", data_schema=vol.Schema({vol.Required("selected_device"): vol.In(devices)}))
+        if data is not None:
+            # Refreshing does not need a device to be picked first
+            schema = {
+                vol.Optional("selected_device"): vol.In(devices),
+                vol.Optional(CONF_REFRESH_DEVICES, default=False): bool,
+            }
+        else:
+            schema = {vol.Required("selected_device"): vol.In(devices)}
+
+        return self.async_show_form(step_id="init", data_schema=vol.Schema(schema), errors=errors)
+
+    async def _async_fetch_remotes(self):
+        sb = SwitchBot(
+            token=self.data["token"],
+            secret=self.data["secret"],
+            session=async_get_clientsession(self.hass),
+            host=self.data.get("host", switchbot_host)
+        )
+        try:
+            return await sb.remotes()
+        except Exception as exception:
+            _LOGGER.error(f"Failed to discover devices: {exception}")
+            raise ConfigEntryAuthFailed from exception
 
     async def async_step_edit_device(self, user_input=None):
         """Handle editing a device."""
+        errors: dict[str, str] = {}
         if user_input is not None:
+            try:
+                validate_macros(user_input.get(CONF_MACROS, []))
+            except MacroError as exception:
+                _LOGGER.debug(f"Invalid macro: {exception}")
+                errors["base"] = "invalid_macro"
+
+        if user_input is not None and not errors:
             #_LOGGER.debug(f"Saving config for device {self.selected_device}: {user_input}")
             new_data = self.config_entry.data.copy()
             new_data[self.selected_device] = user_input
@@ -266,14 +346,15 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
             _LOGGER.debug(f"Updated config_entry.data: {self.config_entry.data}")
             self.current_device_type = None
             self.selected_device = None
-            await self.hass.config_entries.async_reload(self.config_entry.entry_id)
+            # The update listener recreates the entities of the edited remote only
             return self.async_abort(reason="device_configured")
 
         schema = vol.Schema({})
         for remote in self.discovered_devices:
             if remote.id == self.selected_device:
                 # _LOGGER.debug(f"Device ID: {remote.id}, Type: {remote.type}")
-                config = self.config_entry.data.get(remote.id, {})
+                # Show the rejected input again to fix it
+                config = user_input or self.config_entry.data.get(remote.id, {})
                 # _LOGGER.debug(f"Loaded config for device {remote.id}: {config}")
                 if remote.type in CLASS_BY_TYPE:
                     device_class = CLASS_BY_TYPE[remote.type]
@@ -299,7 +380,8 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
         #_LOGGER.debug(f"Generated schema for device {remote.id}: {schema}")
         return self.async_show_form(
             step_id="edit_device",
-            data_schema=schema
+            data_schema=schema,
+            errors=errors,
         )
 
 
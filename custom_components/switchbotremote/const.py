@@ -3,6 +3,12 @@ from enum import IntFlag, StrEnum
 
 DOMAIN = "switchbotremote"
 
+SIGNAL_ADD_REMOTES = "switchbotremote_add_remotes_{}"
+SIGNAL_ADD_HUBS = "switchbotremote_add_hubs_{}"
+
+# Send a power command even if the remote believes the device already is in that state
+ATTR_FORCE = "force"
+
 CONF_POWER_SENSOR = "power_sensor"
 CONF_TEMPERATURE_SENSOR = "temperature_sensor"
 CONF_HUMIDITY_SENSOR = "humidity_sensor"
@@ -19,6 +25,13 @@ CONF_WITH_TEMPERATURE = "with_temperature"
 CONF_ON_COMMAND = "on_command"
 CONF_OFF_COMMAND = "off_command"
 CONF_OVERRIDE_OFF_COMMAND = "override_off_command"
+CONF_VOLUME_STEPS = "volume_steps"
+CONF_MACROS = "macros"
+CONF_REFRESH_DEVICES = "refresh_devices"
+CONF_DISCOVERY_INTERVAL = "discovery_interval"
+CONF_COMMAND_GAP = "command_gap"
+CONF_WEBHOOK = "webhook"
+CONF_WEBHOOK_ID = "webhook_id"
 
 """Supported Devices"""
 DIY_AIR_CONDITIONER_TYPE = "DIY Air Conditioner"
@@ -56,6 +69,9 @@ WATER_HEATER_TYPE = "Water Heater"
 
 OTHERS_TYPE = "Others"
 
+"""Hubs with built-in sensors"""
+HUB_SENSOR_TYPES = ("Hub 2", "Hub 3")
+
 """IR Classes"""
 AIR_CONDITIONER_CLASS = "Air Conditioner"
 FAN_CLASS = "Fan"
@@ -104,60 +120,6 @@ CLASS_BY_TYPE = {
     OTHERS_TYPE: OTHERS_CLASS,
 }
 
-"""Climate Types"""
-IR_CLIMATE_TYPES = [
-    DIY_AIR_CONDITIONER_TYPE,
-    AIR_CONDITIONER_TYPE,
-]
-
-"""Fan Types"""
-IR_FAN_TYPES = [
-    DIY_FAN_TYPE,
-    FAN_TYPE,
-    DIY_AIR_PURIFIER_TYPE,
-    AIR_PURIFIER_TYPE,
-]
-
-"""Light Types"""
-IR_LIGHT_TYPES = [
-    DIY_LIGHT_TYPE,
-    LIGHT_TYPE,
-]
-
-"""Media Types"""
-IR_MEDIA_TYPES = [
-    DIY_TV_TYPE,
-    TV_TYPE,
-    DIY_IPTV_TYPE,
-    IPTV_TYPE,
-    DIY_DVD_TYPE,
-    DVD_TYPE,
-    DIY_SPEAKER_TYPE,
-    SPEAKER_TYPE,
-    DIY_SET_TOP_BOX_TYPE,
-    SET_TOP_BOX_TYPE,
-    DIY_PROJECTOR_TYPE,
-    PROJECTOR_TYPE,
-]
-
-"""Camera Types"""
-IR_CAMERA_TYPES = [
-    DIY_CAMERA_TYPE,
-    CAMERA_TYPE,
-]
-
-"""Vacuum Types"""
-IR_VACUUM_TYPES = [
-    DIY_VACUUM_CLEANER_TYPE,
-    VACUUM_CLEANER_TYPE,
-]
-
-"""Water Heater Types"""
-IR_WATER_HEATER_TYPES = [
-    DIY_WATER_HEATER_TYPE,
-    WATER_HEATER_TYPE,
-]
-
 # This codes and commands specially the test ones are obtained from:
 
 
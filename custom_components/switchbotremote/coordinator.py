@@ -0,0 +1,117 @@
+"""Status of the hubs with built-in sensors, polled in one batch and pushed by the webhook."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import timedelta
+from typing import TYPE_CHECKING, Dict
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+
+from .client.scheduler import PRIORITY_BACKGROUND, seconds_until_reset
+from .const import CONF_WEBHOOK, DOMAIN, SIGNAL_ADD_HUBS
+
+if TYPE_CHECKING:
+    from .data import SwitchBotRemoteData
+
+_LOGGER = logging.getLogger(__name__)
+
+# Readings kept from the hub statuses and events, as decamelized by humps
+HUB_READINGS = ("temperature", "humidity", "light_level")
+
+POLL_INTERVAL = 300
+# With push updates, polling only catches up on missed events
+PUSH_POLL_INTERVAL = 3600
+MAX_POLL_INTERVAL = 3 * 3600
+
+# Share of the API calls left today that hub polling may use
+QUOTA_SHARE = 0.1
+
+# Refresh requests within this window are merged into a single poll
+REFRESH_COOLDOWN = 10
+
+
+def hub_readings(status: dict) -> dict:
+    return {key: status[key] for key in HUB_READINGS if status.get(key) is not None}
+
+
+class HubStatusCoordinator(DataUpdateCoordinator[Dict[str, dict]]):
+    """Readings of every hub of the entry having sensors, by hub id.
+
+    Each poll costs one call per hub. The interval grows as the daily quota runs
+    low, so that polling never takes more than `QUOTA_SHARE` of what is left."""
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, data: SwitchBotRemoteData, push: bool) -> None:
+        super().__init__(
+            hass,
+            _LOGGER,
+            config_entry=entry,
+            name=f"{DOMAIN} hubs {entry.title}",
+            update_interval=timedelta(seconds=PUSH_POLL_INTERVAL if push else POLL_INTERVAL),
+            request_refresh_debouncer=Debouncer(hass, _LOGGER, cooldown=REFRESH_COOLDOWN, immediate=True),
+        )
+        self._data = data
+        self._push = push
+
+    def _next_interval(self) -> timedelta:
+        base = PUSH_POLL_INTERVAL if self._push else POLL_INTERVAL
+        budget = max(1.0, self._data.switchbot.client.scheduler.remaining * QUOTA_SHARE)
+        spread = seconds_until_reset() * len(self._data.sensor_hubs) / budget
+        return timedelta(seconds=min(MAX_POLL_INTERVAL, max(base, spread)))
+
+    async def _async_update_data(self) -> Dict[str, dict]:
+        hub_ids = list(self._data.sensor_hubs)
+        results = await asyncio.gather(
+            *(self._data.switchbot.device_status(hub_id, PRIORITY_BACKGROUND) for hub_id in hub_ids),
+            return_exceptions=True,
+        )
+        self.update_interval = self._next_interval()
+
+        status = dict(self.data or {})
+        errors = []
+        for hub_id, result in zip(hub_ids, results):
+            if isinstance(result, BaseException):
+                errors.append(f"{hub_id}: {result}")
+                continue
+            status[hub_id] = {**status.get(hub_id, {}), **hub_readings(result)}
+
+        if errors and len(errors) == len(hub_ids):
+            raise UpdateFailed(f"Unable to fetch the hub statuses: {errors}")
+        if errors:
+            _LOGGER.debug(f"Unable to fetch some hub statuses: {errors}")
+        return status
+
+    @callback
+    def async_push(self, hub_id: str, status: dict) -> None:
+        """Merge readings pushed by a hub, this postpones the next poll."""
+        if not (readings := hub_readings(status)):
+            return
+        data = dict(self.data or {})
+        data[hub_id] = {**data.get(hub_id, {}), **readings}
+        self.async_set_updated_data(data)
+
+
+@callback
+def async_setup_hubs(hass: HomeAssistant, entry: ConfigEntry, data: SwitchBotRemoteData) -> None:
+    """Poll the hubs with sensors and have their sensors created, for hubs found at setup or later."""
+    if not data.sensor_hubs:
+        return
+
+    if data.coordinator is None:
+        data.coordinator = HubStatusCoordinator(hass, entry, data, push=bool(entry.data.get(CONF_WEBHOOK)))
+        entry.async_on_unload(data.coordinator.async_shutdown)
+        # The sensors start unavailable rather than delaying the setup
+        entry.async_create_background_task(
+            hass, data.coordinator.async_refresh(), f"{DOMAIN}_hubs_{entry.entry_id}"
+        )
+    elif data.sensor_hubs.keys() - (data.coordinator.data or {}).keys():
+        entry.async_create_background_task(
+            hass, data.coordinator.async_request_refresh(), f"{DOMAIN}_hubs_{entry.entry_id}"
+        )
+
+    # The sensor platform adds the hubs it does not have yet
+    async_dispatcher_send(hass, SIGNAL_ADD_HUBS.format(entry.entry_id))
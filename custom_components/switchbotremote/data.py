@@ -0,0 +1,107 @@
+"""Runtime data of a SwitchBot Remote IR config entry."""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Optional, Set
+
+from homeassistant.const import Platform
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.entity import Entity
+from homeassistant.helpers.storage import Store
+
+from .client import SwitchBot
+from .client.remote import Remote
+from .const import CLASS_BY_TYPE, DOMAIN, HUB_SENSOR_TYPES, OTHERS_CLASS
+from .usage import ApiUsageTracker
+
+if TYPE_CHECKING:
+    from .coordinator import HubStatusCoordinator
+    from .pacing import HubPacingStore
+
+RemotesByClass = Dict[str, List[Remote]]
+
+
+class RegisteredRemote(NamedTuple):
+    """What the entities of a remote were created from."""
+
+    name: str
+    type: str
+    hub_id: str
+
+
+def remote_class(remote: Remote) -> str:
+    """Return the IR class of a remote, unknown types are handled as Others."""
+    return CLASS_BY_TYPE.get(remote.type, OTHERS_CLASS)
+
+
+def partition(remotes: List[Remote]) -> RemotesByClass:
+    """Group remotes by IR class."""
+    by_class: RemotesByClass = {}
+    for remote in remotes:
+        by_class.setdefault(remote_class(remote), []).append(remote)
+    return by_class
+
+
+@dataclass
+class SwitchBotRemoteData:
+    """Objects shared by the platforms of a config entry."""
+
+    switchbot: SwitchBot
+    remotes: List[Remote]
+    usage: ApiUsageTracker
+    pacing: HubPacingStore
+    devices_store: Store
+    platforms: Set[Platform]
+    entry_data: dict
+    by_class: RemotesByClass = field(init=False)
+    by_id: Dict[str, Remote] = field(init=False)
+    registered: Dict[str, RegisteredRemote] = field(init=False)
+    entities: Dict[str, List[Entity]] = field(init=False, default_factory=dict)
+    # Readings of the hubs with sensors, None without such hubs
+    coordinator: Optional[HubStatusCoordinator] = field(init=False, default=None)
+
+    def __post_init__(self) -> None:
+        self.set_remotes(self.remotes)
+
+    def set_remotes(self, remotes: List[Remote]) -> None:
+        """Replace the remotes and rebuild the indexes."""
+        self.remotes = remotes
+        self.by_class = partition(remotes)
+        self.by_id = {remote.id: remote for remote in remotes}
+        self.registered = {
+            remote.id: RegisteredRemote(remote.name, remote.type, remote.hub_id)
+            for remote in remotes
+        }
+
+    @property
+    def sensor_hubs(self) -> Dict[str, dict]:
+        """Return the hubs having built-in sensors by id."""
+        return {hub["device_id"]: hub for hub in self.switchbot.hubs if hub.get("device_type") in HUB_SENSOR_TYPES}
+
+    def track(self, entities: List[Entity]) -> None:
+        """Remember the entities created for each remote."""
+        for entity in entities:
+            self.entities.setdefault(entity.sb.id, []).append(entity)
+
+    async def async_remove_entities(self, remote_id: str, forget: bool = False) -> None:
+        """Remove the entities of a remote from Home Assistant.
+
+        Registry entries are kept so that recreated entities get their ids and
+        customizations back, unless `forget` is set."""
+        for entity in self.entities.pop(remote_id, []):
+            if entity.hass is None:
+                continue
+            if forget and entity.registry_entry is not None:
+                # Removing the registry entry removes the entity as well
+                er.async_get(entity.hass).async_remove(entity.entity_id)
+            else:
+                await entity.async_remove()
+
+
+def entry_data_for_remote(hass: HomeAssistant, remote_id: str) -> Optional[SwitchBotRemoteData]:
+    """Return the loaded config entry having the remote, if any."""
+    for data in hass.data.get(DOMAIN, {}).values():
+        if isinstance(data, SwitchBotRemoteData) and remote_id in data.by_id:
+            return data
+    return None
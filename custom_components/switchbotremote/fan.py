@@ -9,12 +9,16 @@ from homeassistant.util.percentage import (
 from homeassistant.const import STATE_UNAVAILABLE, STATE_UNKNOWN, STATE_OFF, STATE_ON
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.event import async_track_state_change_event
-from .client.remote import SupportedRemote
+from .client.remote import SHADOW_POWER, SupportedRemote
+from .client.scheduler import priority_for_context
+from .data import RemotesByClass, SwitchBotRemoteData
+from .pacing import async_expect_power
 
 from .const import (
     DOMAIN,
-    IR_FAN_TYPES,
+    SIGNAL_ADD_REMOTES,
     FAN_CLASS,
     AIR_PURIFIER_TYPE,
     DIY_AIR_PURIFIER_TYPE,
@@ -36,14 +40,18 @@ AIR_PURIFIER_SPEED_COMMANDS = [
     "FAN SPEED 3",
 ]
 
-IR_AIR_PURIFIER_TYPES = [
+# Shadow key of the speed commands; IR fans keep their speed while off
+SHADOW_SPEED = "speed"
+
+IR_AIR_PURIFIER_TYPES = frozenset({
     DIY_AIR_PURIFIER_TYPE,
     AIR_PURIFIER_TYPE,
-]
+})
 
 
 class SwitchBotRemoteFan(FanEntity, RestoreEntity):
     _attr_has_entity_name = False
+    _attr_should_poll = False
     _attr_speed_count = len(SPEED_COMMANDS)
 
     def __init__(
@@ -72,8 +80,8 @@ class SwitchBotRemoteFan(FanEntity, RestoreEntity):
         if sb.type not in IR_AIR_PURIFIER_TYPES:
             self._supported_features |= FanEntityFeature.OSCILLATE
 
-    async def send_command(self, *args):
-        await self._hass.async_add_executor_job(self.sb.command, *args)
+    async def send_command(self, *args, **kwargs):
+        return await self.sb.command(*args, priority=priority_for_context(self._context), **kwargs)
 
     @property
     def device_info(self):
@@ -126,7 +134,7 @@ class SwitchBotRemoteFan(FanEntity, RestoreEntity):
             else SPEED_COMMANDS,
             percentage,
         )
-        await self.send_command(speed)
+        await self.send_command(speed, shadow=SHADOW_SPEED)
         self._speed = speed
 
     async def async_oscillate(self, oscillating: bool) -> None:
@@ -134,9 +142,10 @@ class SwitchBotRemoteFan(FanEntity, RestoreEntity):
         await self.send_command("swing")
         self._is_oscillating = oscillating
 
-    async def async_turn_on(self, percentage: int = None, preset_mode: str = None, **kwargs):
+    async def async_turn_on(self, percentage: int = None, preset_mode: str = None, force: bool = False, **kwargs):
         """Send the power on command."""
-        await self.send_command("turnOn")
+        if await self.send_command("turnOn", shadow=SHADOW_POWER, force=force):
+            async_expect_power(self.hass, self.sb, self._power_sensor, on=True)
 
         self._state = STATE_ON
         self._is_on = True
@@ -146,9 +155,10 @@ class SwitchBotRemoteFan(FanEntity, RestoreEntity):
 
         await self.async_set_percentage(percentage)
 
-    async def async_turn_off(self, **kwargs):
+    async def async_turn_off(self, force: bool = False, **kwargs):
         """Send the power off command."""
-        await self.send_command("turnOff")
+        if await self.send_command("turnOff", shadow=SHADOW_POWER, force=force):
+            async_expect_power(self.hass, self.sb, self._power_sensor, on=False)
         self._state = STATE_OFF
         self._is_on = False
 
@@ -161,6 +171,7 @@ class SwitchBotRemoteFan(FanEntity, RestoreEntity):
                 and state.state != STATE_UNAVAILABLE
                 and state.state != self._state
             ):
+                self.sb.forget(SHADOW_POWER)
                 if state.state == STATE_ON:
                     self._state = STATE_ON
                     self._is_on = True
@@ -183,8 +194,10 @@ class SwitchBotRemoteFan(FanEntity, RestoreEntity):
         await super().async_added_to_hass()
 
         if self._power_sensor:
-            async_track_state_change_event(
-                self.hass, [self._power_sensor], self._async_power_sensor_changed
+            self.async_on_remove(
+                async_track_state_change_event(
+                    self.hass, [self._power_sensor], self._async_power_sensor_changed
+                )
             )
 
             power_sensor_state = self.hass.states.get(self._power_sensor)
@@ -192,16 +205,21 @@ class SwitchBotRemoteFan(FanEntity, RestoreEntity):
                 self._async_update_power(power_sensor_state)
 
 
-async def async_setup_entry(
-    hass: HomeAssistant, entry: ConfigEntry, async_add_entities
-) -> bool:
-    remotes = hass.data[DOMAIN][entry.entry_id]
+async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities) -> bool:
+    data: SwitchBotRemoteData = hass.data[DOMAIN][entry.entry_id]
 
-    entities = [
-        SwitchBotRemoteFan(hass, remote, entry.data.get(remote.id, {}))
-        for remote in filter(lambda r: r.type in IR_FAN_TYPES, remotes)
-    ]
-
-    async_add_entities(entities)
+    @callback
+    def async_add_remotes(by_class: RemotesByClass):
+        entities = [
+            SwitchBotRemoteFan(hass, remote, entry.data.get(remote.id, {}))
+            for remote in by_class.get(FAN_CLASS, [])
+        ]
+        data.track(entities)
+        async_add_entities(entities)
+
+    async_add_remotes(data.by_class)
+    entry.async_on_unload(
+        async_dispatcher_connect(hass, SIGNAL_ADD_REMOTES.format(entry.entry_id), async_add_remotes)
+    )
 
     return True
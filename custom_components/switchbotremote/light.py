@@ -1,13 +1,15 @@
 import logging
-from typing import List, Any
+from typing import Any
 from homeassistant.components.light import (
     LightEntity,
     ATTR_BRIGHTNESS,
+    ATTR_COLOR_TEMP_KELVIN,
     ColorMode,
     LightEntityFeature,
 )
 from homeassistant.helpers.restore_state import RestoreEntity
 from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.event import async_track_state_change_event
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.config_entries import ConfigEntry
@@ -17,9 +19,14 @@ from homeassistant.const import (
     STATE_OFF,
     STATE_ON
 )
-from .client.remote import SupportedRemote
+from .client.remote import SHADOW_POWER, SupportedRemote
+from .client.scheduler import priority_for_context
+from .client.sequence import CommandSequence
+from .client.stepper import SteppedValue, step_to
+from .data import RemotesByClass, SwitchBotRemoteData
+from .pacing import async_expect_power
 
-from .const import DOMAIN, IR_LIGHT_TYPES, LIGHT_CLASS, CONF_POWER_SENSOR
+from .const import ATTR_FORCE, DOMAIN, SIGNAL_ADD_REMOTES, LIGHT_CLASS, CONF_POWER_SENSOR, CONF_WITH_TEMPERATURE
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -30,8 +37,13 @@ class SwitchBotRemoteLight(LightEntity, RestoreEntity):
     """
 
     _attr_has_entity_name = False  # Keep if you really don't want HA to manage the name
+    _attr_should_poll = False
     # Define the brightness step for each brightness up/down command
     BRIGHTNESS_STEP = 25  # This will give approximately 10 steps (255/25)
+    # WARM/WHITE buttons, assumed to span this range in this many presses
+    MIN_COLOR_TEMP_KELVIN = 2700
+    MAX_COLOR_TEMP_KELVIN = 6500
+    COLOR_TEMP_PRESSES = 10
 
     def __init__(self, hass: HomeAssistant, sb: SupportedRemote, options: dict = {}) -> None:
         """
@@ -52,12 +64,27 @@ class SwitchBotRemoteLight(LightEntity, RestoreEntity):
         # Color mode configuration
         self._attr_supported_color_modes = {ColorMode.BRIGHTNESS}
         self._attr_color_mode = ColorMode.BRIGHTNESS
-        self._attr_brightness = 255  # Default to full brightness when turned on
+        # Default to full brightness when turned on
+        self._brightness = SteppedValue(1, 255, self.BRIGHTNESS_STEP, value=255)
+
+        # Unknown until driven to an end of the range once
+        self._color_temp = SteppedValue(
+            self.MIN_COLOR_TEMP_KELVIN,
+            self.MAX_COLOR_TEMP_KELVIN,
+            (self.MAX_COLOR_TEMP_KELVIN - self.MIN_COLOR_TEMP_KELVIN) / self.COLOR_TEMP_PRESSES,
+        )
+        if options.get(CONF_WITH_TEMPERATURE, False):
+            self._attr_supported_color_modes = {ColorMode.COLOR_TEMP}
+            self._attr_color_mode = ColorMode.COLOR_TEMP
+            self._attr_min_color_temp_kelvin = self.MIN_COLOR_TEMP_KELVIN
+            self._attr_max_color_temp_kelvin = self.MAX_COLOR_TEMP_KELVIN
 
         self._power_sensor = options.get(CONF_POWER_SENSOR, None)
+        self._sequence = CommandSequence()
+        self._color_temp_sequence = CommandSequence()
 
-    async def send_command(self, *args):
-        await self._hass.async_add_executor_job(self.sb.command, *args)
+    async def send_command(self, *args, **kwargs):
+        return await self.sb.command(*args, priority=priority_for_context(self._context), **kwargs)
 
     @property
     def device_info(self) -> DeviceInfo:
@@ -88,7 +115,14 @@ class SwitchBotRemoteLight(LightEntity, RestoreEntity):
     @property
     def brightness(self):
         """Return the brightness of the light."""
-        return self._attr_brightness
+        return self._brightness.value
+
+    @property
+    def color_temp_kelvin(self) -> int | None:
+        """Return the color temperature, None until it has been set once."""
+        if self._color_temp.value is None:
+            return None
+        return round(self._color_temp.value)
 
     @property
     def state(self) -> str | None:
@@ -100,6 +134,11 @@ class SwitchBotRemoteLight(LightEntity, RestoreEntity):
         """Return true if light is on."""
         return self._state == STATE_ON
 
+    async def async_will_remove_from_hass(self) -> None:
+        """Stop the level sweeps in progress, they would outlive the entity."""
+        self._sequence.cancel()
+        self._color_temp_sequence.cancel()
+
     async def async_added_to_hass(self) -> None:
         """
         Called when this entity is added to Home Assistant.
@@ -115,14 +154,18 @@ class SwitchBotRemoteLight(LightEntity, RestoreEntity):
             self._state = last_state.state
             # Restore brightness if it was saved
             if last_state.attributes.get(ATTR_BRIGHTNESS) is not None:
-                self._attr_brightness = last_state.attributes.get(ATTR_BRIGHTNESS)
+                self._brightness.value = last_state.attributes.get(ATTR_BRIGHTNESS)
+            if last_state.attributes.get(ATTR_COLOR_TEMP_KELVIN) is not None:
+                self._color_temp.value = last_state.attributes.get(ATTR_COLOR_TEMP_KELVIN)
 
         # If a power sensor is defined, track changes to keep the light's state in sync
         if self._power_sensor:
-            async_track_state_change_event(
-                self.hass,
-                [self._power_sensor],
-                self._async_power_sensor_changed
+            self.async_on_remove(
+                async_track_state_change_event(
+                    self.hass,
+                    [self._power_sensor],
+                    self._async_power_sensor_changed
+                )
             )
             power_sensor_state = self.hass.states.get(self._power_sensor)
             if power_sensor_state and power_sensor_state.state != STATE_UNKNOWN:
@@ -134,63 +177,62 @@ class SwitchBotRemoteLight(LightEntity, RestoreEntity):
         if ATTR_BRIGHTNESS in kwargs:
             target_brightness = kwargs[ATTR_BRIGHTNESS]
             # If light is already on, adjust brightness
-            if self.is_on and self._attr_brightness != target_brightness:
+            if self.is_on and self._brightness.value != target_brightness:
                 await self._async_set_brightness(target_brightness)
             else:
                 # Store the brightness to be applied when turning on
-                self._attr_brightness = target_brightness
+                self._brightness.value = target_brightness
 
-        # Turn on the light
-        await self.send_command("turnOn")
+        # Turn on the light, nothing is sent if it already is
+        if await self.send_command("turnOn", shadow=SHADOW_POWER, force=kwargs.get(ATTR_FORCE, False)):
+            async_expect_power(self.hass, self.sb, self._power_sensor, on=True)
         self._state = STATE_ON
         self.async_write_ha_state()
 
+        if ATTR_COLOR_TEMP_KELVIN in kwargs and ColorMode.COLOR_TEMP in self._attr_supported_color_modes:
+            await self._async_set_color_temp(kwargs[ATTR_COLOR_TEMP_KELVIN])
+
     async def async_turn_off(self, **kwargs: Any) -> None:
         """Turn the entity off."""
-        await self.send_command("turnOff")
+        if await self.send_command("turnOff", shadow=SHADOW_POWER, force=kwargs.get(ATTR_FORCE, False)):
+            async_expect_power(self.hass, self.sb, self._power_sensor, on=False)
         self._state = STATE_OFF
         self.async_write_ha_state()
 
     async def _async_set_brightness(self, brightness):
-        """Set the brightness by sending multiple brightnessUp/Down commands."""
+        """Set the brightness by sending multiple brightnessUp/Down commands.
+
+        A newer target supersedes the steps of the previous one not sent yet."""
+        await self._sequence.run(lambda: self._async_step_brightness(brightness))
+
+    async def _async_step_brightness(self, brightness):
         if not self.is_on:
             # If light is off, we should turn it on first
-            await self.send_command("turnOn")
+            await self.send_command("turnOn", shadow=SHADOW_POWER)
             self._state = STATE_ON
 
-        # Calculate how many steps to take
-        if brightness > self._attr_brightness:
-            # Need to increase brightness
-            while self._attr_brightness < brightness:
-                await self._async_brightness_up()
-                # Break if we've reached or exceeded the target
-                if self._attr_brightness >= brightness:
-                    break
-        elif brightness < self._attr_brightness:
-            # Need to decrease brightness
-            while self._attr_brightness > brightness:
-                await self._async_brightness_down()
-                # Break if we've reached or gone below the target
-                if self._attr_brightness <= brightness:
-                    break
-
+        try:
+            await step_to(
+                self.sb, self._brightness, brightness, ("brightnessDown",), ("brightnessUp",),
+                self.async_write_ha_state, priority_for_context(self._context),
+            )
+        finally:
+            self.async_write_ha_state()
+
+    async def _async_set_color_temp(self, kelvin):
+        """Set the color temperature by sending WARM/WHITE presses, superseding a previous target."""
+        await self._color_temp_sequence.run(lambda: step_to(
+            self.sb, self._color_temp, kelvin, ("WARM", None, True), ("WHITE", None, True),
+            self.async_write_ha_state, priority_for_context(self._context),
+        ))
         self.async_write_ha_state()
 
-    async def _async_brightness_up(self):
-        """Increase brightness by one step."""
-        await self.send_command("brightnessUp")
-        # Increase internal brightness state
-        new_brightness = min(255, self._attr_brightness + self.BRIGHTNESS_STEP)
-        self._attr_brightness = new_brightness
-        return True
-
-    async def _async_brightness_down(self):
-        """Decrease brightness by one step."""
-        await self.send_command("brightnessDown")
-        # Decrease internal brightness state
-        new_brightness = max(1, self._attr_brightness - self.BRIGHTNESS_STEP)
-        self._attr_brightness = new_brightness
-        return True
+    @callback
+    def async_pressed(self, attribute: str, direction: int) -> None:
+        """Account for a brightness or color temperature press sent by a button of the remote."""
+        stepped = self._brightness if attribute == ATTR_BRIGHTNESS else self._color_temp
+        stepped.moved(direction)
+        self.async_write_ha_state()
 
     @callback
     def _async_update_power(self, state) -> None:
@@ -202,6 +244,7 @@ class SwitchBotRemoteLight(LightEntity, RestoreEntity):
         try:
             if state.state not in (STATE_UNKNOWN, STATE_UNAVAILABLE) and state.state != self._state:
                 self._state = STATE_ON if state.state == STATE_ON else STATE_OFF
+                self.sb.forget(SHADOW_POWER)
                 self.async_write_ha_state()
         except ValueError as ex:
             _LOGGER.error("Unable to update from power sensor: %s", ex)
@@ -225,13 +268,20 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_e
         entry (ConfigEntry): The integration config entry
         async_add_entities (function): Callable to add new entities
     """
-    remotes: List[SupportedRemote] = hass.data[DOMAIN][entry.entry_id]
+    data: SwitchBotRemoteData = hass.data[DOMAIN][entry.entry_id]
 
-    # Filter only remotes that match IR_LIGHT_TYPES
-    entities = [
-        SwitchBotRemoteLight(hass, remote, entry.data.get(remote.id, {}))
-        for remote in filter(lambda r: r.type in IR_LIGHT_TYPES, remotes)
-    ]
+    @callback
+    def async_add_remotes(by_class: RemotesByClass):
+        entities = [
+            SwitchBotRemoteLight(hass, remote, entry.data.get(remote.id, {}))
+            for remote in by_class.get(LIGHT_CLASS, [])
+        ]
+        data.track(entities)
+        async_add_entities(entities)
+
+    async_add_remotes(data.by_class)
+    entry.async_on_unload(
+        async_dispatcher_connect(hass, SIGNAL_ADD_REMOTES.format(entry.entry_id), async_add_remotes)
+    )
 
-    async_add_entities(entities)
     return True
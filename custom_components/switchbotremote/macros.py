@@ -0,0 +1,68 @@
+"""Named multi-press routines configured per remote."""
+from __future__ import annotations
+
+import logging
+from typing import Callable, Dict, List, Tuple
+
+from homeassistant.util import slugify
+
+from .client.macro import Macro, MacroError, MacroResult, MacroStep, parse_macro, run_macro
+from .client.remote import Remote
+from .const import CONF_MACROS, MEDIA_PLAYER_COMMANDS
+
+_LOGGER = logging.getLogger(__name__)
+
+# Prefixes choosing the command type of a name, e.g. `command:brightnessUp` or `custom:Netflix`
+PREFIX_COMMAND = "command:"
+PREFIX_CUSTOM = "custom:"
+
+
+def command_resolver(remote_type: str) -> Callable[[str], Tuple[str, bool]]:
+    """Map the command names of a remote type to (action, customize), like its buttons.
+
+    Known names such as `digit_4` use their code and anything else is a custom
+    button, unless the name starts with `PREFIX_COMMAND` or `PREFIX_CUSTOM`."""
+    commands = MEDIA_PLAYER_COMMANDS.get(remote_type.replace("DIY ", ""), {})
+    known = {**commands.get("basic", {}), **commands.get("extra", {})}
+
+    def _resolve(name: str) -> Tuple[str, bool]:
+        if name.startswith(PREFIX_COMMAND):
+            return name[len(PREFIX_COMMAND):].strip(), False
+        if name.startswith(PREFIX_CUSTOM):
+            return name[len(PREFIX_CUSTOM):].strip(), True
+        command_info = known.get(name, {})
+        return command_info.get("action", name), command_info.get("customize", True)
+
+    return _resolve
+
+
+def validate_macros(definitions: List[str]) -> List[Macro]:
+    """Parse the macro definitions of a remote, raises MacroError on the first invalid one."""
+    macros = [parse_macro(definition) for definition in definitions if definition and definition.strip()]
+    # The button of a macro is identified by the slug of its name
+    slugs = [slugify(macro.name) for macro in macros]
+    if len(set(slugs)) != len(slugs):
+        raise MacroError("Macro names must be unique, ignoring case and punctuation")
+    return macros
+
+
+def macros_for(options: dict) -> Dict[str, Macro]:
+    """Return the valid macros of a remote by name."""
+    macros = {}
+    for definition in options.get(CONF_MACROS, []):
+        if not definition or not definition.strip():
+            continue
+        try:
+            macro = parse_macro(definition)
+        except MacroError as exception:
+            _LOGGER.warning(f"Ignoring macro {definition!r}: {exception}")
+            continue
+        macros[macro.name] = macro
+    return macros
+
+
+async def async_run_macro(remote: Remote, steps: List[MacroStep], priority: int) -> MacroResult:
+    result = await run_macro(remote, steps, command_resolver(remote.type), priority)
+    if result.errors:
+        _LOGGER.warning(f"Macro on {remote.name} {'aborted' if result.aborted else 'finished'} with errors: {result.errors}")
+    return result
@@ -1,5 +1,5 @@
 import logging
-from homeassistant.components.media_player import MediaPlayerEntity, MediaPlayerEntityFeature
+from homeassistant.components.media_player import ATTR_MEDIA_VOLUME_LEVEL, MediaPlayerEntity, MediaPlayerEntityFeature
 from homeassistant.helpers.restore_state import RestoreEntity
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.const import (
@@ -13,22 +13,28 @@ from homeassistant.const import (
 )
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.event import async_track_state_change_event
 from .client.remote import SupportedRemote
+from .client.scheduler import priority_for_context
+from .client.sequence import CommandSequence
+from .client.stepper import MINIMUM, SteppedValue, step_to
+from .data import RemotesByClass, SwitchBotRemoteData
+from .pacing import async_expect_power
 
-from .const import DOMAIN, MEDIA_CLASS, IR_MEDIA_TYPES, DIY_PROJECTOR_TYPE, PROJECTOR_TYPE, CONF_POWER_SENSOR, \
+from .const import DOMAIN, SIGNAL_ADD_REMOTES, MEDIA_CLASS, DIY_PROJECTOR_TYPE, PROJECTOR_TYPE, CONF_POWER_SENSOR, CONF_VOLUME_STEPS, \
     MEDIA_PLAYER_COMMANDS, DIY_DVD_TYPE, DVD_TYPE, DIY_SPEAKER_TYPE, SPEAKER_TYPE, TV_TYPE, IPTV_TYPE, DIY_IPTV_TYPE, \
     DIY_TV_TYPE, SET_TOP_BOX_TYPE, DIY_SET_TOP_BOX_TYPE
 
 _LOGGER = logging.getLogger(__name__)
 
-IR_DVD_TYPES = [DVD_TYPE, DIY_DVD_TYPE]
-IR_SPEAKER_TYPES = [SPEAKER_TYPE, DIY_SPEAKER_TYPE]
+IR_DVD_TYPES = frozenset({DVD_TYPE, DIY_DVD_TYPE})
+IR_SPEAKER_TYPES = frozenset({SPEAKER_TYPE, DIY_SPEAKER_TYPE})
 
-IR_TV_TYPES = [TV_TYPE, DIY_TV_TYPE]
-IR_IPTV_TYPES = [DIY_IPTV_TYPE, IPTV_TYPE]
-IR_PROJECTOR_TYPES = [DIY_PROJECTOR_TYPE, PROJECTOR_TYPE]
-IR_SET_TOP_BOX_TYPES = [SET_TOP_BOX_TYPE, DIY_SET_TOP_BOX_TYPE]
+IR_TV_TYPES = frozenset({TV_TYPE, DIY_TV_TYPE})
+IR_IPTV_TYPES = frozenset({DIY_IPTV_TYPE, IPTV_TYPE})
+IR_PROJECTOR_TYPES = frozenset({DIY_PROJECTOR_TYPE, PROJECTOR_TYPE})
+IR_SET_TOP_BOX_TYPES = frozenset({SET_TOP_BOX_TYPE, DIY_SET_TOP_BOX_TYPE})
 
 
 
@@ -73,9 +79,18 @@ class SwitchbotRemoteMediaPlayer(MediaPlayerEntity, RestoreEntity):
         # Load basic commands for this device type
         self._commands = MEDIA_PLAYER_COMMANDS.get(sb.type, {}).get("basic", {})
 
+        # Absolute volume emulated with volume up/down presses, starting from
+        # silent when the level is unknown rather than from full blast
+        self._volume = None
+        self._sequence = CommandSequence()
+        volume_steps = options.get(CONF_VOLUME_STEPS, 0)
+        if volume_steps and "volume_up" in self._commands and "volume_down" in self._commands:
+            self._volume = SteppedValue(0, 1, 1 / volume_steps, resync_to=MINIMUM)
+            self._supported_features |= MediaPlayerEntityFeature.VOLUME_SET
+
     async def send_command(self, *args):
         """Send a command using the SupportedRemote's command method."""
-        await self._hass.async_add_executor_job(self.sb.command, *args)
+        await self.sb.command(*args, priority=priority_for_context(self._context))
 
     @property
     def device_info(self):
@@ -88,8 +103,8 @@ class SwitchbotRemoteMediaPlayer(MediaPlayerEntity, RestoreEntity):
 
     @property
     def should_poll(self):
-        """Push an update after each command."""
-        return True
+        """The state is written after each command, there is nothing to poll."""
+        return False
 
     @property
     def supported_features(self):
@@ -112,30 +127,51 @@ class SwitchbotRemoteMediaPlayer(MediaPlayerEntity, RestoreEntity):
         return self._state
 
 
-    async def async_turn_on(self):
+    async def async_turn_on(self, **kwargs):
         """Turn the media player on."""
         command_info = self._commands.get("turn_on")
         if command_info:
             await self.send_command(command_info["action"], None, command_info["customize"])
+            async_expect_power(self.hass, self.sb, self._power_sensor, on=True)
             self._state = STATE_IDLE if (self.sb.type in IR_SPEAKER_TYPES or self.sb.type in IR_DVD_TYPES) else STATE_ON
             self.async_write_ha_state()
 
 
-    async def async_turn_off(self):
+    async def async_turn_off(self, **kwargs):
         """Turn the media player off."""
         command_info = self._commands.get("turn_off")
         if command_info:
             await self.send_command(command_info["action"], None, command_info["customize"])
+            async_expect_power(self.hass, self.sb, self._power_sensor, on=False)
             self._state = STATE_OFF
             self._source = None
             self.async_write_ha_state()
 
 
+    @property
+    def volume_level(self):
+        """Return the emulated volume level, None while unknown."""
+        return self._volume.value if self._volume is not None else None
+
+    async def async_set_volume_level(self, volume):
+        """Set the volume with the fewest volume up/down presses, superseding a previous target."""
+        if self._volume is None:
+            return
+        down, up = self._commands["volume_down"], self._commands["volume_up"]
+        await self._sequence.run(lambda: step_to(
+            self.sb, self._volume, volume,
+            (down["action"], None, down["customize"]), (up["action"], None, up["customize"]),
+            self.async_write_ha_state, priority_for_context(self._context),
+        ))
+        self.async_write_ha_state()
+
     async def async_volume_up(self):
         """Turn volume up for media player."""
         command_info = self._commands.get("volume_up")
         if command_info:
             await self.send_command(command_info["action"], None, command_info["customize"])
+            if self._volume is not None:
+                self._volume.moved(1)
             self.async_write_ha_state()
 
 
@@ -144,6 +180,8 @@ class SwitchbotRemoteMediaPlayer(MediaPlayerEntity, RestoreEntity):
         command_info = self._commands.get("volume_down")
         if command_info:
             await self.send_command(command_info["action"], None, command_info["customize"])
+            if self._volume is not None:
+                self._volume.moved(-1)
             self.async_write_ha_state()
 
 
@@ -244,22 +282,43 @@ class SwitchbotRemoteMediaPlayer(MediaPlayerEntity, RestoreEntity):
         self.async_write_ha_state()
 
 
+    async def async_will_remove_from_hass(self):
+        """Stop the volume sweep in progress, it would outlive the entity."""
+        self._sequence.cancel()
+
     async def async_added_to_hass(self):
         """Run when entity about to be added."""
         await super().async_added_to_hass()
+
+        last_state = await self.async_get_last_state()
+        if self._volume is not None and last_state is not None:
+            self._volume.value = last_state.attributes.get(ATTR_MEDIA_VOLUME_LEVEL)
+
         if self._power_sensor:
-            async_track_state_change_event(
-                self.hass, [self._power_sensor], self._async_power_sensor_changed)
+            self.async_on_remove(
+                async_track_state_change_event(
+                    self.hass, [self._power_sensor], self._async_power_sensor_changed)
+            )
             power_sensor_state = self.hass.states.get(self._power_sensor)
             if power_sensor_state and power_sensor_state.state != STATE_UNKNOWN:
                 self._async_update_power(power_sensor_state)
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities) -> bool:
-    remotes = hass.data[DOMAIN][entry.entry_id]
-    entities = [
-        SwitchbotRemoteMediaPlayer(hass, remote, entry.data.get(remote.id, {}))
-        for remote in filter(lambda r: r.type in IR_MEDIA_TYPES, remotes)
-    ]
-    async_add_entities(entities)
+    data: SwitchBotRemoteData = hass.data[DOMAIN][entry.entry_id]
+
+    @callback
+    def async_add_remotes(by_class: RemotesByClass):
+        entities = [
+            SwitchbotRemoteMediaPlayer(hass, remote, entry.data.get(remote.id, {}))
+            for remote in by_class.get(MEDIA_CLASS, [])
+        ]
+        data.track(entities)
+        async_add_entities(entities)
+
+    async_add_remotes(data.by_class)
+    entry.async_on_unload(
+        async_dispatcher_connect(hass, SIGNAL_ADD_REMOTES.format(entry.entry_id), async_add_remotes)
+    )
+
     return True
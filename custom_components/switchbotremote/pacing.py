@@ -0,0 +1,88 @@
+"""Persistence of the per-hub command pacing and power sensor feedback."""
+from __future__ import annotations
+
+import logging
+from typing import Callable, Dict
+
+from homeassistant.const import STATE_OFF, STATE_ON
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
+
+from .client.dispatcher import HubDispatcher
+from .client.remote import Remote
+from .const import DOMAIN
+from .data import entry_data_for_remote
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+SAVE_DELAY = 60
+
+# Time given to a power sensor to follow an on/off command
+FEEDBACK_TIMEOUT = 15
+
+class HubPacingStore:
+    """Keep the gaps learned by the hub channels of a config entry across restarts.
+
+    The gaps are learned from the configured gap, they start over when it changes."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str, dispatcher: HubDispatcher) -> None:
+        self.hass = hass
+        self.dispatcher = dispatcher
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.pacing")
+        # Power sensor checks in progress, by sensor
+        self._pending_feedback: Dict[str, CALLBACK_TYPE] = {}
+
+    async def async_load(self) -> None:
+        if (data := await self._store.async_load()) and data.get("command_gap") == self.dispatcher.gap:
+            self.dispatcher.restore(data.get("gaps", {}))
+
+    @callback
+    def async_start(self) -> Callable[[], None]:
+        """Save the gaps whenever they change, returns the function stopping it."""
+        return self.dispatcher.add_listener(
+            lambda: self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+        )
+
+    def _data_to_save(self) -> dict:
+        return {"command_gap": self.dispatcher.gap, "gaps": self.dispatcher.gaps}
+
+    async def async_save(self) -> None:
+        await self._store.async_save(self._data_to_save())
+
+    @callback
+    def async_expect_power(self, remote: Remote, power_sensor: str, on: bool) -> None:
+        """Count a failure on the hub of `remote` if `power_sensor` does not follow an on/off command."""
+        if cancel := self._pending_feedback.pop(power_sensor, None):
+            cancel()
+
+        expected = STATE_ON if on else STATE_OFF
+
+        @callback
+        def _async_check(_now):
+            self._pending_feedback.pop(power_sensor, None)
+            state = self.hass.states.get(power_sensor)
+            # Only on/off sensors tell whether the command was received
+            if state is None or state.state not in (STATE_ON, STATE_OFF):
+                return
+            if state.state != expected:
+                _LOGGER.debug(f"{power_sensor} did not turn {expected} after a command to {remote}")
+                self.dispatcher.channel(remote.hub_id).record(False)
+
+        self._pending_feedback[power_sensor] = async_call_later(self.hass, FEEDBACK_TIMEOUT, _async_check)
+
+    @callback
+    def async_cancel_feedback(self) -> None:
+        """Drop the power sensor checks in progress, e.g. when the entry unloads."""
+        for cancel in self._pending_feedback.values():
+            cancel()
+        self._pending_feedback.clear()
+
+
+@callback
+def async_expect_power(hass: HomeAssistant, remote: Remote, power_sensor: str | None, on: bool) -> None:
+    """Check `power_sensor` after an on/off command, see `HubPacingStore.async_expect_power`."""
+    if not power_sensor or (data := entry_data_for_remote(hass, remote.id)) is None:
+        return
+    data.pacing.async_expect_power(remote, power_sensor, on)
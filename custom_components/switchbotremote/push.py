@@ -0,0 +1,101 @@
+"""Push updates from the SwitchBot cloud through a Home Assistant webhook."""
+from __future__ import annotations
+
+import logging
+from typing import Callable
+
+import humps
+from aiohttp import web
+
+from homeassistant.components import webhook
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.network import NoURLAvailableError
+
+from .client import SwitchBot
+from .const import CONF_WEBHOOK_ID, DOMAIN
+from .data import SwitchBotRemoteData
+
+_LOGGER = logging.getLogger(__name__)
+
+EVENT_CHANGE_REPORT = "changeReport"
+
+
+@callback
+def async_setup_push(hass: HomeAssistant, entry: ConfigEntry, data: SwitchBotRemoteData) -> Callable[[], None]:
+    """Receive the device events of the account, returns the function stopping it.
+
+    Anything able to reach Home Assistant can post events to the webhook, e.g. a
+    local script replaying captured events; the cloud is only set up to send
+    them when Home Assistant has an external URL."""
+    webhook_id = entry.data[CONF_WEBHOOK_ID]
+
+    async def _async_handle_webhook(hass: HomeAssistant, webhook_id: str, request: web.Request) -> None:
+        try:
+            event = humps.decamelize(await request.json())
+        except ValueError:
+            _LOGGER.debug("Ignoring a webhook call without JSON")
+            return
+
+        if event.get("event_type") != EVENT_CHANGE_REPORT:
+            return
+
+        context = event.get("context", {})
+        # Sent with or without colons, the device ids have none
+        device_id = str(context.get("device_mac", "")).replace(":", "").upper()
+        if data.coordinator is not None and device_id in data.sensor_hubs:
+            data.coordinator.async_push(device_id, context)
+        else:
+            _LOGGER.debug(f"Ignoring an event of device {device_id}")
+
+    webhook.async_register(
+        hass, DOMAIN, entry.title, webhook_id, _async_handle_webhook, allowed_methods=["POST"]
+    )
+    _LOGGER.debug(f"Receiving SwitchBot events at {webhook.async_generate_path(webhook_id)}")
+
+    entry.async_create_background_task(
+        hass, _async_configure_cloud(hass, data, webhook_id), f"{DOMAIN}_webhook_{entry.entry_id}"
+    )
+
+    return lambda: webhook.async_unregister(hass, webhook_id)
+
+
+async def _async_configure_cloud(hass: HomeAssistant, data: SwitchBotRemoteData, webhook_id: str):
+    """Point the SwitchBot cloud to the webhook, unless it already sends its events elsewhere."""
+    try:
+        url = webhook.async_generate_url(hass, webhook_id, allow_internal=False)
+    except NoURLAvailableError:
+        _LOGGER.warning("No external URL to give to the SwitchBot cloud, only local events will be received")
+        return
+
+    try:
+        urls = await data.switchbot.webhook_urls()
+        if url in urls:
+            return
+        if urls:
+            # A single URL per account, do not take it from another integration
+            _LOGGER.warning(f"The SwitchBot cloud already sends its events to {urls[0]}")
+            return
+        await data.switchbot.setup_webhook(url)
+    except Exception as exception:
+        _LOGGER.warning(f"Unable to set up the SwitchBot webhook: {exception}")
+
+
+async def async_remove_cloud_webhook(hass: HomeAssistant, switchbot: SwitchBot, webhook_id: str) -> bool:
+    """Stop the SwitchBot cloud from sending events to the webhook, returns whether it no longer does.
+
+    Only our own URL is deleted: the account has a single one and a stale URL
+    would keep the webhook from being set up again."""
+    try:
+        url = webhook.async_generate_url(hass, webhook_id, allow_internal=False)
+    except NoURLAvailableError:
+        # The cloud was never given a URL
+        return True
+
+    try:
+        if url in await switchbot.webhook_urls():
+            await switchbot.delete_webhook(url)
+    except Exception as exception:
+        _LOGGER.warning(f"Unable to delete the SwitchBot webhook: {exception}")
+        return False
+    return True
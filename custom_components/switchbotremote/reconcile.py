@@ -0,0 +1,207 @@
+"""Apply changes of the SwitchBot device list without reloading the config entry."""
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, field
+from typing import Iterable, List
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import Platform
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr, entity_registry as er
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+
+from .client.remote import Remote
+from .client.scheduler import PRIORITY_AUTOMATION
+from .coordinator import async_setup_hubs
+from .const import (
+    DOMAIN,
+    SIGNAL_ADD_REMOTES,
+    AIR_CONDITIONER_CLASS,
+    FAN_CLASS,
+    LIGHT_CLASS,
+    MEDIA_CLASS,
+    CAMERA_CLASS,
+    VACUUM_CLASS,
+    WATER_HEATER_CLASS,
+    CONF_CUSTOMIZE_COMMANDS,
+    CONF_MACROS,
+    CONF_WITH_BRIGHTNESS,
+    CONF_WITH_ION,
+    CONF_WITH_TEMPERATURE,
+    CONF_WITH_TIMER,
+)
+from .data import SwitchBotRemoteData, partition, remote_class
+
+_LOGGER = logging.getLogger(__name__)
+
+PLATFORM_BY_CLASS = {
+    AIR_CONDITIONER_CLASS: Platform.CLIMATE,
+    MEDIA_CLASS: Platform.MEDIA_PLAYER,
+    LIGHT_CLASS: Platform.LIGHT,
+    FAN_CLASS: Platform.FAN,
+    CAMERA_CLASS: Platform.BUTTON,
+    VACUUM_CLASS: Platform.VACUUM,
+    WATER_HEATER_CLASS: Platform.WATER_HEATER,
+}
+
+BUTTON_OPTIONS = (
+    CONF_WITH_ION,
+    CONF_WITH_TIMER,
+    CONF_WITH_BRIGHTNESS,
+    CONF_WITH_TEMPERATURE,
+    CONF_CUSTOMIZE_COMMANDS,
+    CONF_MACROS,
+)
+
+
+def platforms_for(entry: ConfigEntry, remotes: List[Remote]) -> set[Platform]:
+    """Return the platforms having at least one entity for `remotes`."""
+    platforms = {Platform.SENSOR}
+    for remote in remotes:
+        options = entry.data.get(remote.id, {})
+        device_class = remote_class(remote)
+
+        # Every remote has a remote entity for send_command
+        platforms.add(Platform.REMOTE)
+        if device_class in PLATFORM_BY_CLASS:
+            platforms.add(PLATFORM_BY_CLASS[device_class])
+        if any(options.get(option) for option in BUTTON_OPTIONS):
+            platforms.add(Platform.BUTTON)
+
+    return platforms
+
+
+@dataclass
+class RemoteChanges:
+    """Difference between the registered remotes and a new device list."""
+
+    added: List[Remote] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    changed: List[Remote] = field(default_factory=list)
+    moved: List[Remote] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed or self.moved)
+
+
+def diff_remotes(data: SwitchBotRemoteData, remotes: List[Remote]) -> RemoteChanges:
+    """Compare `remotes` with what the current entities were created from."""
+    changes = RemoteChanges()
+    ids = set()
+    for remote in remotes:
+        ids.add(remote.id)
+        registered = data.registered.get(remote.id)
+        if registered is None:
+            changes.added.append(remote)
+        elif (registered.name, registered.type) != (remote.name, remote.type):
+            changes.changed.append(remote)
+        elif registered.hub_id != remote.hub_id:
+            # Commands follow Remote.hub_id, which is updated in place
+            changes.moved.append(remote)
+
+    changes.removed = [id for id in data.registered if id not in ids]
+    return changes
+
+
+async def async_refresh(
+    hass: HomeAssistant, entry: ConfigEntry, data: SwitchBotRemoteData, priority: int = PRIORITY_AUTOMATION
+) -> List[Remote]:
+    """Fetch the device list from the cloud, persist it and apply the differences."""
+    known_hubs = set(data.sensor_hubs)
+    remotes = await data.switchbot.remotes(force_refresh=True, priority=priority)
+    await data.devices_store.async_save({"devices": data.switchbot.devices, "hubs": data.switchbot.hubs})
+    await async_reconcile(hass, entry, data, remotes)
+
+    async_setup_hubs(hass, entry, data)
+    if new_hubs := data.sensor_hubs.keys() - known_hubs:
+        # Air conditioners take the readings of their hub when created
+        await async_reconfigure(hass, entry, data, [
+            remote.id for remote in data.by_class.get(AIR_CONDITIONER_CLASS, [])
+            if remote.hub_id in new_hubs and remote.id in data.entities
+        ])
+    return remotes
+
+
+async def async_reconcile(hass: HomeAssistant, entry: ConfigEntry, data: SwitchBotRemoteData, remotes: List[Remote]) -> RemoteChanges:
+    """Bring entities and devices in line with `remotes`, touching only what changed."""
+    changes = diff_remotes(data, remotes)
+    if not changes:
+        return changes
+
+    _LOGGER.debug(f"Reconciling remotes: {changes}")
+    retyped = {
+        remote.id for remote in changes.changed
+        if data.registered[remote.id].type != remote.type
+    }
+    data.set_remotes(remotes)
+
+    device_registry = dr.async_get(hass)
+    for id in changes.removed:
+        await data.async_remove_entities(id)
+        if device := device_registry.async_get_device(identifiers={(DOMAIN, id)}):
+            device_registry.async_remove_device(device.id)
+
+    for remote in changes.changed:
+        # Entities cache the name and type of their remote, create them again.
+        # A new type may map to another platform, drop the old registry entries then.
+        await data.async_remove_entities(remote.id, forget=remote.id in retyped)
+        if device := device_registry.async_get_device(identifiers={(DOMAIN, remote.id)}):
+            device_registry.async_update_device(
+                device.id, name=remote.name, model=remote_class(remote) + " Remote"
+            )
+
+    await async_add_remotes(hass, entry, data, changes.added + changes.changed)
+    return changes
+
+
+async def async_reconfigure(hass: HomeAssistant, entry: ConfigEntry, data: SwitchBotRemoteData, remote_ids: Iterable[str]):
+    """Recreate the entities of `remote_ids` with their current options, leaving the other remotes alone."""
+    previous = {}
+    for id in remote_ids:
+        previous[id] = {
+            entity.unique_id: entity.entity_id
+            for entity in data.entities.get(id, [])
+            if entity.registry_entry is not None
+        }
+        await data.async_remove_entities(id)
+
+    await async_add_remotes(hass, entry, data, [data.by_id[id] for id in previous if id in data.by_id])
+
+    # Options can disable entities, e.g. the extra buttons
+    entity_registry = er.async_get(hass)
+    for id, entities in previous.items():
+        kept = {entity.unique_id for entity in data.entities.get(id, [])}
+        for unique_id, entity_id in entities.items():
+            if unique_id not in kept:
+                entity_registry.async_remove(entity_id)
+
+
+async def async_add_remotes(hass: HomeAssistant, entry: ConfigEntry, data: SwitchBotRemoteData, remotes: List[Remote]):
+    """Create the entities of `remotes`, setting up the platforms that are not loaded yet."""
+    if not remotes:
+        return
+
+    # Loaded platforms pick up the remotes, the others are set up with all of them
+    async_dispatcher_send(hass, SIGNAL_ADD_REMOTES.format(entry.entry_id), partition(remotes))
+
+    if new_platforms := platforms_for(entry, remotes) - data.platforms:
+        _LOGGER.debug(f"Loading platforms: {new_platforms}")
+        data.platforms |= new_platforms
+        await hass.config_entries.async_late_forward_entry_setups(entry, new_platforms)
+
+
+@callback
+def async_remove_stale_devices(hass: HomeAssistant, entry: ConfigEntry, data: SwitchBotRemoteData):
+    """Remove the registered devices of remotes and hubs that no longer exist."""
+    device_registry = dr.async_get(hass)
+    for device_entry in dr.async_entries_for_config_entry(
+        device_registry, entry.entry_id
+    ):
+        device_id = list(device_entry.identifiers)[0][1]
+        if device_id == entry.entry_id:
+            # The API usage device of the entry itself
+            continue
+
+        if device_id not in data.by_id and device_id not in data.sensor_hubs:
+            device_registry.async_remove_device(device_entry.id)
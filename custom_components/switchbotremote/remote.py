@@ -1,32 +1,44 @@
 import logging
-from typing import List
-from homeassistant.components.remote import RemoteEntity
+from typing import Iterable, List
+from homeassistant.components.remote import (
+    ATTR_DELAY_SECS,
+    ATTR_HOLD_SECS,
+    ATTR_NUM_REPEATS,
+    DEFAULT_DELAY_SECS,
+    DEFAULT_HOLD_SECS,
+    DEFAULT_NUM_REPEATS,
+    RemoteEntity,
+)
 from homeassistant.helpers.restore_state import RestoreEntity
 from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.event import async_track_state_change_event
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.const import STATE_UNAVAILABLE, STATE_UNKNOWN, STATE_OFF, STATE_ON
-from .client.remote import SupportedRemote
+from .client.macro import MAX_REPEAT, MacroStep
+from .client.remote import Remote, SupportedRemote
+from .client.scheduler import priority_for_context
+from .data import RemotesByClass, SwitchBotRemoteData, remote_class
+from .macros import async_run_macro
 
-from .const import DOMAIN, OTHERS_TYPE, CLASS_BY_TYPE, CONF_POWER_SENSOR, CONF_ON_COMMAND, CONF_OFF_COMMAND
+from .const import DOMAIN, SIGNAL_ADD_REMOTES, OTHERS_CLASS, CONF_POWER_SENSOR, CONF_ON_COMMAND, CONF_OFF_COMMAND
 
 _LOGGER = logging.getLogger(__name__)
 
 
-class SwitchBotRemoteOther(RemoteEntity, RestoreEntity):
+class SwitchBotRemote(RemoteEntity):
+    """Send any command of an IR remote, including the custom buttons of DIY remotes."""
+
     _attr_has_entity_name = False
+    _attr_should_poll = False
 
-    def __init__(self, sb: SupportedRemote, options: dict = {}) -> None:
+    def __init__(self, sb: Remote, options: dict = {}) -> None:
         super().__init__()
         self.sb = sb
         self._device_name = sb.name
         self._attr_unique_id = sb.id
-        self._is_on = False
-
-        self._power_sensor = options.get(CONF_POWER_SENSOR, None)
-        self._on_command = options.get(CONF_ON_COMMAND, None)
-        self._off_command = options.get(CONF_OFF_COMMAND, None)
 
     @property
     def device_info(self):
@@ -34,7 +46,7 @@ class SwitchBotRemoteOther(RemoteEntity, RestoreEntity):
             identifiers={(DOMAIN, self._attr_unique_id)},
             manufacturer="SwitchBot",
             name=self._device_name,
-            model=CLASS_BY_TYPE[self.sb.type] + " Remote",
+            model=remote_class(self.sb) + " Remote",
         )
 
     @property
@@ -42,27 +54,67 @@ class SwitchBotRemoteOther(RemoteEntity, RestoreEntity):
         """Return the display name of this remote."""
         return self._device_name
 
-    @property
-    def is_on(self):
-        """If the switch is currently on or off."""
-        return self._is_on
-
     @property
     def unique_id(self):
         """Return a unique ID."""
         return self._attr_unique_id
 
-    def turn_on(self, activity: str = None, **kwargs):
+    async def async_send_command(self, command: Iterable[str], **kwargs) -> None:
+        """Send the commands as one job on the hub of the remote."""
+        steps = _command_steps(
+            list(command),
+            kwargs.get(ATTR_NUM_REPEATS, DEFAULT_NUM_REPEATS),
+            kwargs.get(ATTR_DELAY_SECS, DEFAULT_DELAY_SECS),
+            kwargs.get(ATTR_HOLD_SECS, DEFAULT_HOLD_SECS),
+            self.sb.client.dispatcher.channel(self.sb.hub_id).gap,
+        )
+        result = await async_run_macro(self.sb, steps, priority_for_context(self._context))
+        if result.aborted:
+            raise HomeAssistantError(f"Sending to {self._device_name} aborted: {result.errors[-1]}")
+
+
+def _command_steps(commands: List[str], repeats: int, delay: float, hold: float, gap: float) -> List[MacroStep]:
+    """Turn a send_command call into macro steps.
+
+    The hub channel already spaces the presses by its gap, only longer delays
+    become waits. IR cannot hold a button through the cloud, so a hold repeats
+    the press for its duration like a held remote button does, up to MAX_REPEAT
+    presses."""
+    presses = min(1 + int(hold / gap), MAX_REPEAT) if gap > 0 else 1
+    steps: List[MacroStep] = []
+    for _ in range(repeats):
+        for command in commands:
+            if steps and delay > gap:
+                steps.append(MacroStep(None, delay=delay))
+            steps.append(MacroStep(command, presses))
+    return steps
+
+
+class SwitchBotRemoteOther(SwitchBotRemote, RestoreEntity):
+    def __init__(self, sb: SupportedRemote, options: dict = {}) -> None:
+        super().__init__(sb, options)
+        self._is_on = False
+
+        self._power_sensor = options.get(CONF_POWER_SENSOR, None)
+        self._on_command = options.get(CONF_ON_COMMAND, None)
+        self._off_command = options.get(CONF_OFF_COMMAND, None)
+
+    @property
+    def is_on(self):
+        """If the switch is currently on or off."""
+        return self._is_on
+
+    async def async_turn_on(self, activity: str = None, **kwargs):
         """Send the power on command."""
         if self._on_command:
-            self.sb.command(self._on_command)
+            await self.sb.command(self._on_command, priority=priority_for_context(self._context))
 
-    def turn_off(self, activity: str = None, **kwargs):
+    async def async_turn_off(self, activity: str = None, **kwargs):
         """Send the power off command."""
         if self._off_command:
-            self.sb.command(self._off_command)
+            await self.sb.command(self._off_command, priority=priority_for_context(self._context))
         elif self._on_command:
-            self.sb.command(self._on_command)
+            await self.sb.command(self._on_command, priority=priority_for_context(self._context))
 
     @callback
     def _async_update_power(self, state):
@@ -86,8 +138,10 @@ class SwitchBotRemoteOther(RemoteEntity, RestoreEntity):
         await super().async_added_to_hass()
 
         if self._power_sensor:
-            async_track_state_change_event(
-                self.hass, [self._power_sensor], self._async_power_sensor_changed)
+            self.async_on_remove(
+                async_track_state_change_event(
+                    self.hass, [self._power_sensor], self._async_power_sensor_changed)
+            )
 
             power_sensor_state = self.hass.states.get(self._power_sensor)
             if power_sensor_state and power_sensor_state.state != STATE_UNKNOWN:
@@ -95,16 +149,28 @@ class SwitchBotRemoteOther(RemoteEntity, RestoreEntity):
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities) -> bool:
-    remotes: List[SupportedRemote] = hass.data[DOMAIN][entry.entry_id]
-    entities = []
-
-    for remote in remotes:
-        options = entry.data.get(remote.id, {})
+    data: SwitchBotRemoteData = hass.data[DOMAIN][entry.entry_id]
 
-        if (remote.type == OTHERS_TYPE and options.get("on_command", None)):
-            entities.append(SwitchBotRemoteOther(remote, options))
-
-    _LOGGER.debug(f'Adding remotes {entities}')
-    async_add_entities(entities)
+    @callback
+    def async_add_remotes(by_class: RemotesByClass):
+        entities = []
+
+        for device_class, remotes in by_class.items():
+            for remote in remotes:
+                options = entry.data.get(remote.id, {})
+
+                if device_class == OTHERS_CLASS and options.get(CONF_ON_COMMAND):
+                    entities.append(SwitchBotRemoteOther(remote, options))
+                else:
+                    entities.append(SwitchBotRemote(remote, options))
+
+        _LOGGER.debug(f'Adding remotes {entities}')
+        data.track(entities)
+        async_add_entities(entities)
+
+    async_add_remotes(data.by_class)
+    entry.async_on_unload(
+        async_dispatcher_connect(hass, SIGNAL_ADD_REMOTES.format(entry.entry_id), async_add_remotes)
+    )
 
     return True
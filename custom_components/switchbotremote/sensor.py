@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import PERCENTAGE, EntityCategory, UnitOfTemperature
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.device_registry import DeviceEntryType
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.helpers.entity import DeviceInfo
+
+from .const import DOMAIN, SIGNAL_ADD_HUBS
+from .coordinator import HubStatusCoordinator
+from .data import SwitchBotRemoteData
+from .usage import ApiUsageTracker
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, kw_only=True)
+class SwitchBotUsageSensorEntityDescription(SensorEntityDescription):
+    value_fn: Callable[[ApiUsageTracker], Any]
+    attributes_fn: Callable[[ApiUsageTracker], dict[str, Any]] | None = None
+
+
+USAGE_SENSORS = (
+    SwitchBotUsageSensorEntityDescription(
+        key="calls_today",
+        name="API calls today",
+        icon="mdi:counter",
+        native_unit_of_measurement="calls",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda usage: usage.calls_today,
+        attributes_fn=lambda usage: {
+            "day": usage.day,
+            "by_endpoint": dict(usage.by_endpoint),
+            "by_remote": dict(usage.by_remote),
+            "by_outcome": dict(usage.by_outcome),
+        },
+    ),
+    SwitchBotUsageSensorEntityDescription(
+        key="remaining_quota",
+        name="API quota remaining",
+        icon="mdi:gauge",
+        native_unit_of_measurement="calls",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda usage: usage.remaining,
+        attributes_fn=lambda usage: {
+            "daily_quota": usage.daily_quota,
+            "scheduler": usage.client.quota_stats,
+        },
+    ),
+    SwitchBotUsageSensorEntityDescription(
+        key="projected_calls",
+        name="API calls projected today",
+        icon="mdi:chart-line",
+        native_unit_of_measurement="calls",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda usage: usage.projected,
+    ),
+    SwitchBotUsageSensorEntityDescription(
+        key="error_rate",
+        name="API error rate",
+        icon="mdi:alert-circle-outline",
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda usage: usage.error_rate,
+        attributes_fn=lambda usage: {
+            "internal_error_rate": usage.internal_error_rate,
+            "retries": usage.client.retry_stats,
+            "hubs": usage.client.hub_stats,
+        },
+    ),
+)
+
+
+@dataclass(frozen=True, kw_only=True)
+class SwitchBotHubSensorEntityDescription(SensorEntityDescription):
+    """Reading of a hub, `key` is its name in the hub status."""
+
+
+HUB_SENSORS = (
+    SwitchBotHubSensorEntityDescription(
+        key="temperature",
+        device_class=SensorDeviceClass.TEMPERATURE,
+        native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    SwitchBotHubSensorEntityDescription(
+        key="humidity",
+        device_class=SensorDeviceClass.HUMIDITY,
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    SwitchBotHubSensorEntityDescription(
+        key="light_level",
+        name="Light level",
+        icon="mdi:brightness-5",
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+)
+
+
+class SwitchBotUsageSensor(SensorEntity):
+    _attr_has_entity_name = True
+    _attr_should_poll = False
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    # Breakdowns for troubleshooting, growing with every endpoint, remote and hub
+    _unrecorded_attributes = frozenset(
+        {"by_endpoint", "by_remote", "by_outcome", "scheduler", "retries", "hubs"}
+    )
+
+    entity_description: SwitchBotUsageSensorEntityDescription
+
+    def __init__(self, entry: ConfigEntry, usage: ApiUsageTracker, description: SwitchBotUsageSensorEntityDescription) -> None:
+        super().__init__()
+        self.entity_description = description
+        self._usage = usage
+        self._attr_unique_id = f"{entry.entry_id}_{description.key}"
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, entry.entry_id)},
+            manufacturer="SwitchBot",
+            name=entry.title,
+            model="Cloud API",
+            entry_type=DeviceEntryType.SERVICE,
+        )
+
+    @property
+    def native_value(self):
+        return self.entity_description.value_fn(self._usage)
+
+    @property
+    def extra_state_attributes(self):
+        if self.entity_description.attributes_fn is None:
+            return None
+        return self.entity_description.attributes_fn(self._usage)
+
+    async def async_added_to_hass(self):
+        """Run when entity about to be added."""
+        await super().async_added_to_hass()
+        self.async_on_remove(self._usage.async_add_listener(self.async_write_ha_state))
+
+
+class SwitchBotHubSensor(CoordinatorEntity[HubStatusCoordinator], SensorEntity):
+    """Built-in sensor of a hub, updated when the hub status is polled or pushed."""
+
+    _attr_has_entity_name = True
+
+    entity_description: SwitchBotHubSensorEntityDescription
+
+    def __init__(self, coordinator: HubStatusCoordinator, hub: dict, description: SwitchBotHubSensorEntityDescription) -> None:
+        super().__init__(coordinator)
+        self.entity_description = description
+        self._hub_id = hub["device_id"]
+        self._attr_unique_id = f"{self._hub_id}_{description.key}"
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, self._hub_id)},
+            manufacturer="SwitchBot",
+            name=hub.get("device_name"),
+            model=hub.get("device_type"),
+        )
+
+    @property
+    def _readings(self) -> dict:
+        return (self.coordinator.data or {}).get(self._hub_id, {})
+
+    @property
+    def available(self) -> bool:
+        return super().available and self.entity_description.key in self._readings
+
+    @property
+    def native_value(self):
+        return self._readings.get(self.entity_description.key)
+
+
+async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities) -> bool:
+    data: SwitchBotRemoteData = hass.data[DOMAIN][entry.entry_id]
+
+    async_add_entities(
+        SwitchBotUsageSensor(entry, data.usage, description)
+        for description in USAGE_SENSORS
+    )
+
+    added = set()
+
+    @callback
+    def async_add_hubs():
+        if data.coordinator is None:
+            return
+        hubs = [hub for id, hub in data.sensor_hubs.items() if id not in added]
+        added.update(hub["device_id"] for hub in hubs)
+        async_add_entities(
+            SwitchBotHubSensor(data.coordinator, hub, description)
+            for hub in hubs
+            for description in HUB_SENSORS
+        )
+
+    async_add_hubs()
+    entry.async_on_unload(
+        async_dispatcher_connect(hass, SIGNAL_ADD_HUBS.format(entry.entry_id), async_add_hubs)
+    )
+
+    return True
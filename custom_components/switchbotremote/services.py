@@ -0,0 +1,195 @@
+"""Services of the SwitchBot Remote IR integration."""
+from __future__ import annotations
+
+import logging
+import time
+
+import voluptuous as vol
+
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
+from homeassistant.exceptions import ServiceValidationError
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.entity import Entity
+from homeassistant.helpers.service import async_extract_entity_ids
+
+from .client.batch import BatchCommand, run_batch
+from .client.macro import MacroError, parse_steps
+from .client.remote import Remote
+from .client.scheduler import priority_for_context
+from .const import ATTR_FORCE, DOMAIN
+from .data import SwitchBotRemoteData, entry_data_for_remote
+from .macros import async_run_macro, macros_for
+
+_LOGGER = logging.getLogger(__name__)
+
+SERVICE_SEND_BATCH = "send_batch"
+SERVICE_RUN_MACRO = "run_macro"
+SERVICE_TURN_ON = "turn_on"
+SERVICE_TURN_OFF = "turn_off"
+
+ATTR_COMMANDS = "commands"
+ATTR_REMOTE_ID = "remote_id"
+ATTR_COMMAND = "command"
+ATTR_PARAMETER = "parameter"
+ATTR_CUSTOMIZE = "customize"
+ATTR_MACRO = "macro"
+ATTR_STEPS = "steps"
+
+BATCH_COMMAND_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_REMOTE_ID): cv.string,
+        vol.Required(ATTR_COMMAND): cv.string,
+        vol.Optional(ATTR_PARAMETER): cv.string,
+        vol.Optional(ATTR_CUSTOMIZE, default=False): cv.boolean,
+    }
+)
+
+SEND_BATCH_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_COMMANDS): vol.All(cv.ensure_list, [BATCH_COMMAND_SCHEMA]),
+    }
+)
+
+RUN_MACRO_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            vol.Required(ATTR_REMOTE_ID): cv.string,
+            vol.Exclusive(ATTR_MACRO, "macro"): cv.string,
+            vol.Exclusive(ATTR_STEPS, "macro"): cv.string,
+        }
+    ),
+    cv.has_at_least_one_key(ATTR_MACRO, ATTR_STEPS),
+)
+
+TURN_SCHEMA = cv.make_entity_service_schema(
+    {
+        vol.Optional(ATTR_FORCE, default=True): cv.boolean,
+    }
+)
+
+
+def _find_entry_data(hass: HomeAssistant, remote_id: str) -> SwitchBotRemoteData:
+    """Return the loaded config entry having the remote."""
+    if (data := entry_data_for_remote(hass, remote_id)) is None:
+        raise ServiceValidationError(f"Unknown remote {remote_id}")
+    return data
+
+
+def _find_remote(hass: HomeAssistant, remote_id: str) -> Remote:
+    """Return a remote of any loaded config entry."""
+    return _find_entry_data(hass, remote_id).by_id[remote_id]
+
+
+async def _async_find_entities(hass: HomeAssistant, call: ServiceCall, method: str) -> list[Entity]:
+    """Return the targeted entities of the loaded config entries having `method`."""
+    entity_ids = await async_extract_entity_ids(hass, call)
+    entities = [
+        entity
+        for data in hass.data.get(DOMAIN, {}).values()
+        if isinstance(data, SwitchBotRemoteData)
+        for tracked in data.entities.values()
+        for entity in tracked
+        if entity.hass is not None and entity.entity_id in entity_ids and hasattr(entity, method)
+    ]
+    if not entities:
+        raise ServiceValidationError("No SwitchBot remote that can be turned on and off is targeted")
+    return entities
+
+
+async def _async_turn(hass: HomeAssistant, call: ServiceCall, state: str) -> None:
+    """Turn entities on or off, sending the command even if they seem to be in that state already."""
+    method = f"async_turn_{state}"
+    for entity in await _async_find_entities(hass, call, method):
+        entity.async_set_context(call.context)
+        await getattr(entity, method)(force=call.data[ATTR_FORCE])
+        entity.async_write_ha_state()
+
+
+async def _async_send_batch(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Send the commands, then report how each one went."""
+    # Resolve everything first, so a typo does not leave the batch half sent
+    commands = [
+        BatchCommand(
+            _find_remote(hass, item[ATTR_REMOTE_ID]),
+            item[ATTR_COMMAND],
+            item.get(ATTR_PARAMETER),
+            item[ATTR_CUSTOMIZE],
+        )
+        for item in call.data[ATTR_COMMANDS]
+    ]
+
+    start = time.monotonic()
+    results = await run_batch(commands, priority_for_context(call.context))
+    elapsed = round(time.monotonic() - start, 3)
+
+    failed = sum(1 for result in results if not result.success)
+    if failed:
+        _LOGGER.warning(f"{failed} of {len(results)} batched commands failed")
+
+    return {
+        "results": [
+            {
+                ATTR_REMOTE_ID: item.remote.id,
+                ATTR_COMMAND: item.command,
+                "success": result.success,
+                "error": result.error,
+                "elapsed": result.elapsed,
+            }
+            for item, result in zip(commands, results)
+        ],
+        "failed": failed,
+        "elapsed": elapsed,
+    }
+
+
+async def _async_run_macro(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Run a configured macro or ad hoc steps on a remote."""
+    remote_id = call.data[ATTR_REMOTE_ID]
+    data = _find_entry_data(hass, remote_id)
+
+    if ATTR_MACRO in call.data:
+        macros = macros_for(data.entry_data.get(remote_id, {}))
+        if (macro := macros.get(call.data[ATTR_MACRO])) is None:
+            raise ServiceValidationError(f"Unknown macro {call.data[ATTR_MACRO]} of remote {remote_id}")
+        steps = macro.steps
+    else:
+        try:
+            steps = parse_steps(call.data[ATTR_STEPS])
+        except MacroError as exception:
+            raise ServiceValidationError(f"Invalid steps: {exception}") from exception
+
+    result = await async_run_macro(data.by_id[remote_id], steps, priority_for_context(call.context))
+    return result._asdict()
+
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the services of the integration, shared by all config entries."""
+
+    async def _async_handle_send_batch(call: ServiceCall) -> ServiceResponse:
+        return await _async_send_batch(hass, call)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SEND_BATCH,
+        _async_handle_send_batch,
+        schema=SEND_BATCH_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    async def _async_handle_run_macro(call: ServiceCall) -> ServiceResponse:
+        return await _async_run_macro(hass, call)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_RUN_MACRO,
+        _async_handle_run_macro,
+        schema=RUN_MACRO_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    for state, service in (("on", SERVICE_TURN_ON), ("off", SERVICE_TURN_OFF)):
+
+        async def _async_handle_turn(call: ServiceCall, state: str = state) -> None:
+            await _async_turn(hass, call, state)
+
+        hass.services.async_register(DOMAIN, service, _async_handle_turn, schema=TURN_SCHEMA)
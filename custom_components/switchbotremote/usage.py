@@ -0,0 +1,163 @@
+"""Persistent accounting of the SwitchBot API calls made by a config entry."""
+from __future__ import annotations
+
+import logging
+from collections import Counter
+from typing import Callable
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.event import async_track_utc_time_change
+from homeassistant.helpers.storage import Store
+
+from .client.client import OUTCOME_500, OUTCOME_OK, SwitchBotClient
+from .client.scheduler import seconds_until_reset, utc_day
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+SAVE_DELAY = 30
+
+# Every call is counted, but the listeners hear of it at most this often
+NOTIFY_COOLDOWN = 30
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+
+def split_path(path: str) -> tuple[str, str | None]:
+    """Return the endpoint and the remote id of an API path, e.g. devices/<id>/commands."""
+    parts = path.strip("/").split("/")
+    if len(parts) >= 2 and parts[0] == "devices":
+        return "/".join([parts[0], *parts[2:]]) or parts[0], parts[1]
+    return "/".join(parts), None
+
+
+class ApiUsageTracker:
+    """Count every call made by a client, per endpoint, remote and outcome, for the current UTC day."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str, client: SwitchBotClient) -> None:
+        self.hass = hass
+        self.client = client
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.usage")
+        self._listeners: list[Callable[[], None]] = []
+        self._notify_debouncer = Debouncer(
+            hass, _LOGGER, cooldown=NOTIFY_COOLDOWN, immediate=True, function=self._async_notify
+        )
+        self._reset(utc_day())
+
+    def _reset(self, day: str) -> None:
+        self.day = day
+        self.calls = 0
+        self.by_endpoint: Counter = Counter()
+        self.by_remote: Counter = Counter()
+        self.by_outcome: Counter = Counter()
+
+    async def async_load(self) -> None:
+        """Restore today's counters and start counting the client calls."""
+        data = await self._store.async_load()
+        if data and data.get("day") == utc_day():
+            self.day = data["day"]
+            self.calls = data.get("calls", 0)
+            self.by_endpoint.update(data.get("by_endpoint", {}))
+            self.by_remote.update(data.get("by_remote", {}))
+            self.by_outcome.update(data.get("by_outcome", {}))
+            self.client.scheduler.restore(self.day, self.calls)
+
+    @callback
+    def async_start(self) -> Callable[[], None]:
+        """Listen to the client requests, returns the function stopping it."""
+        remove_listener = self.client.add_request_listener(self._async_record)
+        remove_reset = async_track_utc_time_change(self.hass, self._async_new_day, hour=0, minute=0, second=0)
+
+        @callback
+        def _async_stop() -> None:
+            remove_listener()
+            remove_reset()
+            self._notify_debouncer.async_shutdown()
+
+        return _async_stop
+
+    @callback
+    def _async_record(self, method: str, path: str, outcome: str) -> None:
+        day = utc_day()
+        if day != self.day:
+            self._reset(day)
+
+        endpoint, remote_id = split_path(path)
+        self.calls += 1
+        self.by_endpoint[f"{method} {endpoint}"] += 1
+        if remote_id is not None:
+            self.by_remote[remote_id] += 1
+        self.by_outcome[outcome] += 1
+
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+        self._notify_debouncer.async_schedule_call()
+
+    @callback
+    def _async_new_day(self, _now) -> None:
+        """Show the counters of the new day at midnight UTC rather than at the next call."""
+        self.client.scheduler.roll_day()
+        if (day := utc_day()) != self.day:
+            self._reset(day)
+            self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+        self._async_notify()
+
+    @callback
+    def _async_notify(self) -> None:
+        for listener in list(self._listeners):
+            listener()
+
+    def _data_to_save(self) -> dict:
+        return {
+            "day": self.day,
+            "calls": self.calls,
+            "by_endpoint": dict(self.by_endpoint),
+            "by_remote": dict(self.by_remote),
+            "by_outcome": dict(self.by_outcome),
+        }
+
+    @callback
+    def async_add_listener(self, listener: Callable[[], None]) -> Callable[[], None]:
+        """Call `listener` after counted requests, at most every `NOTIFY_COOLDOWN` seconds; returns the function removing it."""
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+    async def async_save(self) -> None:
+        await self._store.async_save(self._data_to_save())
+
+    @property
+    def daily_quota(self) -> int:
+        return self.client.scheduler.daily_quota
+
+    @property
+    def calls_today(self) -> int:
+        if utc_day() != self.day:
+            return 0
+        return self.calls
+
+    @property
+    def remaining(self) -> int:
+        return max(0, self.daily_quota - self.calls_today)
+
+    @property
+    def projected(self) -> int:
+        """Calls expected by the daily reset if the current rate of the day keeps up."""
+        elapsed = SECONDS_PER_DAY - seconds_until_reset()
+        if elapsed <= 0:
+            return self.calls_today
+        return round(self.calls_today * SECONDS_PER_DAY / elapsed)
+
+    @property
+    def error_rate(self) -> float | None:
+        """Percentage of today's calls that did not succeed."""
+        if not self.calls_today:
+            return None
+        return round(100 * (self.calls - self.by_outcome[OUTCOME_OK]) / self.calls, 1)
+
+    @property
+    def internal_error_rate(self) -> float | None:
+        """Percentage of today's calls answered with a 500 status."""
+        if not self.calls_today:
+            return None
+        return round(100 * self.by_outcome[OUTCOME_500] / self.calls, 1)
@@ -1,20 +1,23 @@
-from typing import List
 from homeassistant.components.vacuum import (
     StateVacuumEntity,
     VacuumEntityFeature
 )
 from homeassistant.components.vacuum.const import VacuumActivity
 from homeassistant.helpers.restore_state import RestoreEntity
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.config_entries import ConfigEntry
 from .client.remote import SupportedRemote
+from .client.scheduler import priority_for_context
+from .data import RemotesByClass, SwitchBotRemoteData
 
-from .const import DOMAIN, IR_VACUUM_TYPES, VACUUM_CLASS
+from .const import DOMAIN, SIGNAL_ADD_REMOTES, VACUUM_CLASS
 
 
 class SwitchBotRemoteVacuum(StateVacuumEntity, RestoreEntity):
     _attr_has_entity_name = False
+    _attr_should_poll = False
 
     def __init__(self, hass: HomeAssistant, sb: SupportedRemote, options: dict = {}):
         super().__init__()
@@ -27,7 +30,7 @@ class SwitchBotRemoteVacuum(StateVacuumEntity, RestoreEntity):
         self._supported_features = VacuumEntityFeature.STATE | VacuumEntityFeature.START | VacuumEntityFeature.STOP | VacuumEntityFeature.RETURN_HOME
 
     async def send_command(self, *args):
-        await self._hass.async_add_executor_job(self.sb.command, *args)
+        await self.sb.command(*args, priority=priority_for_context(self._context))
 
     @property
     def device_info(self):
@@ -83,13 +86,20 @@ class SwitchBotRemoteVacuum(StateVacuumEntity, RestoreEntity):
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities) -> bool:
-    remotes: List[SupportedRemote] = hass.data[DOMAIN][entry.entry_id]
-
-    entities = [
-        SwitchBotRemoteVacuum(hass, remote, entry.data.get(remote.id, {}))
-        for remote in filter(lambda r: r.type in IR_VACUUM_TYPES, remotes)
-    ]
-
-    async_add_entities(entities)
+    data: SwitchBotRemoteData = hass.data[DOMAIN][entry.entry_id]
+
+    @callback
+    def async_add_remotes(by_class: RemotesByClass):
+        entities = [
+            SwitchBotRemoteVacuum(hass, remote, entry.data.get(remote.id, {}))
+            for remote in by_class.get(VACUUM_CLASS, [])
+        ]
+        data.track(entities)
+        async_add_entities(entities)
+
+    async_add_remotes(data.by_class)
+    entry.async_on_unload(
+        async_dispatcher_connect(hass, SIGNAL_ADD_REMOTES.format(entry.entry_id), async_add_remotes)
+    )
 
     return True
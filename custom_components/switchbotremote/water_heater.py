@@ -1,16 +1,19 @@
-from .const import DOMAIN, WATER_HEATER_CLASS, IR_WATER_HEATER_TYPES, CONF_POWER_SENSOR, CONF_TEMPERATURE_SENSOR, CONF_TEMP_MAX, CONF_TEMP_MIN
+from .const import DOMAIN, SIGNAL_ADD_REMOTES, WATER_HEATER_CLASS, CONF_POWER_SENSOR, CONF_TEMPERATURE_SENSOR, CONF_TEMP_MAX, CONF_TEMP_MIN
 import logging
-from typing import List
 from homeassistant.components.water_heater import WaterHeaterEntity, WaterHeaterEntityFeature, STATE_HEAT_PUMP
 from homeassistant.helpers.restore_state import RestoreEntity
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.core import Event
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.event import async_track_state_change_event
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import STATE_UNAVAILABLE, STATE_UNKNOWN, STATE_OFF, STATE_ON
 from homeassistant.const import UnitOfTemperature
 from .client.remote import SupportedRemote
+from .client.scheduler import priority_for_context
+from .data import RemotesByClass, SwitchBotRemoteData
+from .pacing import async_expect_power
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -21,6 +24,7 @@ DEFAULT_MAX_TEMP = 65
 
 class SwitchBotRemoteWaterHeater(WaterHeaterEntity, RestoreEntity):
     _attr_has_entity_name = False
+    _attr_should_poll = False
     _attr_operation_list = [STATE_OFF, STATE_HEAT_PUMP]
 
     def __init__(self, sb: SupportedRemote, options: dict = {}) -> None:
@@ -88,25 +92,27 @@ class SwitchBotRemoteWaterHeater(WaterHeaterEntity, RestoreEntity):
         """Return the min temperature."""
         return self._min_temp
 
-    def turn_on(self, activity: str = None, **kwargs):
+    async def async_turn_on(self, activity: str = None, **kwargs):
         """Send the power on command."""
-        self.sb.command("turnOn")
+        await self.sb.command("turnOn", priority=priority_for_context(self._context))
+        async_expect_power(self.hass, self.sb, self._power_sensor, on=True)
         self._state = STATE_HEAT_PUMP
         self._is_on = True
 
-    def turn_off(self, activity: str = None, **kwargs):
+    async def async_turn_off(self, activity: str = None, **kwargs):
         """Send the power off command."""
-        self.sb.command("turnOff")
+        await self.sb.command("turnOff", priority=priority_for_context(self._context))
+        async_expect_power(self.hass, self.sb, self._power_sensor, on=False)
         self._state = STATE_OFF
         self._is_on = False
 
-    def set_operation_mode(self, operation_mode: str) -> None:
+    async def async_set_operation_mode(self, operation_mode: str) -> None:
         """Set operation mode."""
         if operation_mode == STATE_HEAT_PUMP:
-            self.turn_on()
+            await self.async_turn_on()
 
         if operation_mode == STATE_OFF:
-            self.turn_off()
+            await self.async_turn_off()
 
     @callback
     def _async_update_temp(self, state):
@@ -153,16 +159,20 @@ class SwitchBotRemoteWaterHeater(WaterHeaterEntity, RestoreEntity):
         await super().async_added_to_hass()
 
         if self._temperature_sensor:
-            async_track_state_change_event(
-                self.hass, [self._temperature_sensor], self._async_temp_sensor_changed)
+            self.async_on_remove(
+                async_track_state_change_event(
+                    self.hass, [self._temperature_sensor], self._async_temp_sensor_changed)
+            )
 
             temp_sensor_state = self.hass.states.get(self._temperature_sensor)
             if temp_sensor_state and temp_sensor_state.state != STATE_UNKNOWN:
                 self._async_update_temp(temp_sensor_state)
 
         if self._power_sensor:
-            async_track_state_change_event(
-                self.hass, [self._power_sensor], self._async_power_sensor_changed)
+            self.async_on_remove(
+                async_track_state_change_event(
+                    self.hass, [self._power_sensor], self._async_power_sensor_changed)
+            )
 
             power_sensor_state = self.hass.states.get(self._power_sensor)
             if power_sensor_state and power_sensor_state.state != STATE_UNKNOWN:
@@ -170,13 +180,20 @@ class SwitchBotRemoteWaterHeater(WaterHeaterEntity, RestoreEntity):
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities) -> bool:
-    remotes: List[SupportedRemote] = hass.data[DOMAIN][entry.entry_id]
+    data: SwitchBotRemoteData = hass.data[DOMAIN][entry.entry_id]
 
-    entities = [
-        SwitchBotRemoteWaterHeater(remote, entry.data.get(remote.id, {}))
-        for remote in filter(lambda r: r.type in IR_WATER_HEATER_TYPES, remotes)
-    ]
-
-    async_add_entities(entities)
+    @callback
+    def async_add_remotes(by_class: RemotesByClass):
+        entities = [
+            SwitchBotRemoteWaterHeater(remote, entry.data.get(remote.id, {}))
+            for remote in by_class.get(WATER_HEATER_CLASS, [])
+        ]
+        data.track(entities)
+        async_add_entities(entities)
+
+    async_add_remotes(data.by_class)
+    entry.async_on_unload(
+        async_dispatcher_connect(hass, SIGNAL_ADD_REMOTES.format(entry.entry_id), async_add_remotes)
+    )
 
     return True
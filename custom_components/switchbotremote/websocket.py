@@ -0,0 +1,99 @@
+"""WebSocket commands for remote control dashboards."""
+from __future__ import annotations
+
+import logging
+import time
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.components import websocket_api
+from homeassistant.core import HomeAssistant, callback
+
+from .client.remote import Remote
+from .client.scheduler import PRIORITY_INTERACTIVE
+from .const import DOMAIN
+from .data import entry_data_for_remote
+
+_LOGGER = logging.getLogger(__name__)
+
+# A hold stream stops by itself if it is never released
+HOLD_TIMEOUT = 30
+
+COMMAND_SCHEMA = {
+    vol.Required("remote_id"): str,
+    vol.Required("command"): str,
+    vol.Optional("parameter"): str,
+    vol.Optional("customize", default=False): bool,
+}
+
+
+@callback
+def async_setup_websocket(hass: HomeAssistant) -> None:
+    websocket_api.async_register_command(hass, websocket_command)
+    websocket_api.async_register_command(hass, websocket_hold)
+
+
+def _find_remote(hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict) -> Remote | None:
+    if (data := entry_data_for_remote(hass, msg["remote_id"])) is None:
+        connection.send_error(msg["id"], websocket_api.ERR_NOT_FOUND, f"Unknown remote {msg['remote_id']}")
+        return None
+    return data.by_id[msg["remote_id"]]
+
+
+async def _async_press(remote: Remote, msg: dict) -> float:
+    """Send the command of `msg` on the hub channel, returns the seconds until acknowledged."""
+    start = time.monotonic()
+    await remote.command(msg["command"], msg.get("parameter"), msg["customize"], priority=PRIORITY_INTERACTIVE)
+    return round(time.monotonic() - start, 3)
+
+
+@websocket_api.websocket_command({vol.Required("type"): f"{DOMAIN}/command", **COMMAND_SCHEMA})
+@websocket_api.async_response
+async def websocket_command(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]
+) -> None:
+    """Send one command straight to the hub of the remote and acknowledge it."""
+    if (remote := _find_remote(hass, connection, msg)) is None:
+        return
+
+    try:
+        latency = await _async_press(remote, msg)
+    except Exception as exception:
+        connection.send_error(msg["id"], websocket_api.ERR_HOME_ASSISTANT_ERROR, str(exception))
+        return
+
+    connection.send_result(msg["id"], {"latency": latency})
+
+
+@websocket_api.websocket_command({vol.Required("type"): f"{DOMAIN}/hold", **COMMAND_SCHEMA})
+@callback
+def websocket_hold(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]
+) -> None:
+    """Repeat a command until the subscription is closed, like a held remote button.
+
+    Each press is reported as an event; the hub channel paces the repeats."""
+    if (remote := _find_remote(hass, connection, msg)) is None:
+        return
+
+    async def _async_repeat():
+        start = time.monotonic()
+        presses = 0
+        while time.monotonic() - start < HOLD_TIMEOUT:
+            try:
+                latency = await _async_press(remote, msg)
+            except Exception as exception:
+                connection.send_message(
+                    websocket_api.event_message(msg["id"], {"stopped": "error", "error": str(exception)})
+                )
+                return
+            presses += 1
+            connection.send_message(websocket_api.event_message(msg["id"], {"press": presses, "latency": latency}))
+
+        _LOGGER.debug(f"Hold of {msg['command']} on {remote.id} was not released after {HOLD_TIMEOUT} s")
+        connection.send_message(websocket_api.event_message(msg["id"], {"stopped": "timeout"}))
+
+    task = hass.async_create_background_task(_async_repeat(), f"{DOMAIN}_hold_{remote.id}")
+    connection.subscriptions[msg["id"]] = task.cancel
+    connection.send_result(msg["id"])